@@ -0,0 +1,241 @@
+"""
+Columnar in-memory snapshot of order lines for the analytics reports
+
+Every order line is kept as one entry in five NumPy arrays (order id, item id,
+order day, quantity, subtotal): 24 bytes per line. Reports (revenue by item
+type, top items, daily or monthly series) group with ``bincount`` over those
+arrays instead of querying the transactional database, which takes
+milliseconds over millions of lines.
+
+Orders are immutable once created, so a refresh only reads the lines of orders
+newer than the highest order id already loaded. The last
+ANALYTICS_REFRESH_OVERLAP order ids are read again and lines of orders already
+loaded are skipped: an order that committed after a higher id had been seen is
+not missed. Item names and types come from a small per-item table reloaded
+when the items table changes.
+
+A report refreshes the snapshot when it is older than ANALYTICS_MAX_AGE
+seconds, so results lag writes by at most that long. The first request loads
+every line; with several uvicorn workers each process keeps its own copy.
+"""
+from datetime import date
+from typing import Literal, Optional
+import os
+import threading
+import time
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import conditional
+import models
+
+ANALYTICS_MAX_AGE = float(os.getenv("ANALYTICS_MAX_AGE", "5"))  # seconds
+ANALYTICS_REFRESH_OVERLAP = int(os.getenv("ANALYTICS_REFRESH_OVERLAP", "100"))  # order ids
+ANALYTICS_BATCH_SIZE = 50_000
+
+# Integer columns are 32-bit in the schema; days are date ordinals
+COLUMNS = {"order_id": np.int32, "item_id": np.int32, "day": np.int32, "quantity": np.int32, "subtotal": np.float64}
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+class Lines:
+    """Read-only view of the snapshot: the column arrays plus the item table"""
+
+    def __init__(self, columns: dict, item_types: np.ndarray, type_names: list[str], item_names: dict):
+        self.order_id = columns["order_id"]
+        self.item_id = columns["item_id"]
+        self.day = columns["day"]
+        self.quantity = columns["quantity"]
+        self.subtotal = columns["subtotal"]
+        self.size = len(self.order_id)
+        # item_types[item_id] indexes type_names, -1 for unknown ids
+        self.item_types = item_types
+        self.type_names = type_names
+        self.item_names = item_names
+
+    def select(self, start: Optional[date] = None, end: Optional[date] = None,
+               item_type: Optional[str] = None, item_id: Optional[int] = None) -> Optional[np.ndarray]:
+        """Boolean mask of the lines matching the filters, None when all match"""
+        conditions = []
+        if start is not None:
+            conditions.append(self.day >= start.toordinal())
+        if end is not None:
+            conditions.append(self.day <= end.toordinal())
+        if item_id is not None:
+            conditions.append(self.item_id == item_id)
+        if item_type is not None:
+            code = self.type_names.index(item_type) if item_type in self.type_names else -2
+            conditions.append(self.types_of(self.item_id) == code)
+        if not conditions:
+            return None
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask &= condition
+        return mask
+
+    def types_of(self, item_ids: np.ndarray) -> np.ndarray:
+        codes = np.full(max(int(item_ids.max(initial=0)) + 1, len(self.item_types)), -1, np.int32)
+        codes[:len(self.item_types)] = self.item_types
+        return codes[item_ids]
+
+    def per_item(self, mask: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lines, quantity and revenue indexed by item id"""
+        # bincount works on intp indexes; convert once rather than in each call
+        item_id = (self.item_id if mask is None else self.item_id[mask]).astype(np.intp)
+        quantity = self.quantity if mask is None else self.quantity[mask]
+        subtotal = self.subtotal if mask is None else self.subtotal[mask]
+        return np.bincount(item_id), np.bincount(item_id, weights=quantity), np.bincount(item_id, weights=subtotal)
+
+class Snapshot:
+    def __init__(self, max_age: float = ANALYTICS_MAX_AGE, overlap: int = ANALYTICS_REFRESH_OVERLAP):
+        self.max_age = max_age
+        self.overlap = overlap
+        # Arrays are allocated with spare capacity; published views cover the
+        # filled prefix, which appends never touch
+        self._arrays = {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self._last_order_id = 0
+        self._items_fingerprint = None
+        self._items = (np.empty(0, np.int32), [], {})
+        self._view: Optional[Lines] = None
+        self._refreshed_at = float("-inf")
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def current(self, db: Session) -> Lines:
+        """The snapshot, refreshed first if it is older than ``max_age``"""
+        if time.monotonic() - self._refreshed_at >= self.max_age:
+            # Never wait for another refresh: in async mode requests share the
+            # event loop thread and a blocking acquire would deadlock
+            if self._lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._refreshed_at >= self.max_age:
+                        self._refresh(db)
+                finally:
+                    self._lock.release()
+        if self._view is None:
+            raise HTTPException(status_code=503, detail="Analytics snapshot is loading", headers={"Retry-After": "1"})
+        return self._view
+
+    def _refresh(self, db: Session):
+        fingerprint = conditional.fingerprint(db, models.Item)
+        if fingerprint != self._items_fingerprint:
+            self._items = self._load_items(db)
+            self._items_fingerprint = fingerprint
+
+        low = max(self._last_order_id - self.overlap, 0)
+        seen = self._arrays["order_id"][:self._size]
+        seen = np.unique(seen[seen > low])
+        statement = select(
+            models.OrderItem.order_id, models.OrderItem.item_id, models.Order.order_date,
+            models.OrderItem.quantity, models.OrderItem.subtotal,
+        ).join(models.Order, models.Order.id == models.OrderItem.order_id).where(models.OrderItem.order_id > low)
+        result = db.execute(statement.execution_options(yield_per=ANALYTICS_BATCH_SIZE))
+        for rows in result.partitions():
+            count = len(rows)
+            batch = {
+                "order_id": np.fromiter((row[0] for row in rows), np.int32, count),
+                "item_id": np.fromiter((row[1] for row in rows), np.int32, count),
+                "day": np.fromiter((row[2].toordinal() for row in rows), np.int32, count),
+                "quantity": np.fromiter((row[3] for row in rows), np.int32, count),
+                "subtotal": np.fromiter((row[4] for row in rows), np.float64, count),
+            }
+            if len(seen):
+                new = ~np.isin(batch["order_id"], seen)
+                batch = {name: values[new] for name, values in batch.items()}
+            self._append(batch)
+
+        columns = {name: values[:self._size] for name, values in self._arrays.items()}
+        if self._size:
+            self._last_order_id = max(self._last_order_id, int(columns["order_id"].max()))
+        self._view = Lines(columns, *self._items)
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    @staticmethod
+    def _load_items(db: Session) -> tuple[np.ndarray, list[str], dict]:
+        rows = db.execute(select(models.Item.id, models.Item.name, models.Item.item_type)).all()
+        type_names = sorted({row[2] for row in rows})
+        codes = {name: code for code, name in enumerate(type_names)}
+        item_types = np.full(max((row[0] for row in rows), default=0) + 1, -1, np.int32)
+        for item_id, _, item_type in rows:
+            item_types[item_id] = codes[item_type]
+        return item_types, type_names, {row[0]: row[1] for row in rows}
+
+    def _append(self, batch: dict):
+        count = len(batch["order_id"])
+        needed = self._size + count
+        if needed > len(self._arrays["order_id"]):
+            capacity = max(needed, 2 * len(self._arrays["order_id"]), 1024)
+            for name, values in self._arrays.items():
+                grown = np.empty(capacity, values.dtype)
+                grown[:self._size] = values[:self._size]
+                self._arrays[name] = grown
+        for name, values in batch.items():
+            self._arrays[name][self._size:needed] = values
+        self._size = needed
+
+    def stats(self) -> dict:
+        view = self._view
+        return {
+            "lines": view.size if view else 0,
+            "bytes": sum(values.nbytes for values in self._arrays.values()),
+            "last_order_id": self._last_order_id,
+            "refreshes": self.refreshes,
+            "age_seconds": round(time.monotonic() - self._refreshed_at, 1) if view else None,
+        }
+
+snapshot = Snapshot()
+
+def revenue_by_type(lines: Lines, start: Optional[date] = None, end: Optional[date] = None) -> list[dict]:
+    counts, quantity, revenue = lines.per_item(lines.select(start, end))
+    codes = lines.types_of(np.arange(len(counts)))
+    known = codes >= 0
+    size = len(lines.type_names)
+    by_type = [np.bincount(codes[known], weights=values[known], minlength=size) for values in (counts, quantity, revenue)]
+    return sorted((
+        {"item_type": lines.type_names[code], "lines": int(by_type[0][code]),
+         "quantity": int(by_type[1][code]), "revenue": round(float(by_type[2][code]), 2)}
+        for code in np.flatnonzero(by_type[0]).tolist()
+    ), key=lambda row: -row["revenue"])
+
+def top_items(lines: Lines, by: Literal["quantity", "revenue"] = "revenue", limit: int = 10,
+              start: Optional[date] = None, end: Optional[date] = None, item_type: Optional[str] = None) -> list[dict]:
+    counts, quantity, revenue = lines.per_item(lines.select(start, end, item_type))
+    values = quantity if by == "quantity" else revenue
+    sold = np.flatnonzero(counts)
+    if len(sold) > limit:
+        sold = sold[np.argpartition(-values[sold], limit - 1)[:limit]]
+    # Highest first, ties by item id
+    sold = sold[np.lexsort((sold, -values[sold]))]
+    codes = lines.types_of(sold)
+    return [
+        {"item_id": item_id, "name": lines.item_names.get(item_id), "item_type": lines.type_names[code] if code >= 0 else None,
+         "lines": int(counts[item_id]), "quantity": int(quantity[item_id]), "revenue": round(float(revenue[item_id]), 2)}
+        for item_id, code in zip(sold.tolist(), codes.tolist())
+    ]
+
+def timeseries(lines: Lines, granularity: Literal["day", "month"] = "day", start: Optional[date] = None,
+               end: Optional[date] = None, item_type: Optional[str] = None, item_id: Optional[int] = None) -> list[dict]:
+    """Totals per day or month, including periods without sales, between the first and last matching day"""
+    mask = lines.select(start, end, item_type, item_id)
+    day = lines.day if mask is None else lines.day[mask]
+    if not len(day):
+        return []
+    first = start.toordinal() if start else int(day.min())
+    last = end.toordinal() if end else int(day.max())
+    offset = (day - first).astype(np.intp)
+    size = last - first + 1
+    totals = [np.bincount(offset, minlength=size)] + [
+        np.bincount(offset, weights=values if mask is None else values[mask], minlength=size)
+        for values in (lines.quantity, lines.subtotal)
+    ]
+    periods = (np.arange(first, last + 1) - _EPOCH).astype("datetime64[D]")
+    if granularity == "month":
+        periods, index = np.unique(periods.astype("datetime64[M]"), return_inverse=True)
+        totals = [np.bincount(index, weights=values, minlength=len(periods)) for values in totals]
+    return [
+        {"period": str(period), "lines": int(count), "quantity": int(quantity), "revenue": round(float(revenue), 2)}
+        for period, count, quantity, revenue in zip(periods, *totals)
+    ]
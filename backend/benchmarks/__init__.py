@@ -0,0 +1,4 @@
+"""
+Benchmarks and stress tests for the backend, run from backend/ with
+``python -m benchmarks.<name>`` after ``pip install -r requirements-dev.txt``
+"""
@@ -0,0 +1,67 @@
+"""
+Report latency over a synthetic analytics snapshot, without a database
+
+Fills ``analytics.Lines`` with ``--lines`` order lines spread over ``--items``
+items in ``--item-types`` types and ``--days`` days, then times each report.
+
+    python -m benchmarks.analytics --lines 5000000 --items 20000 --days 730
+"""
+import argparse
+import time
+from datetime import date, timedelta
+import numpy as np
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--item-types", type=int, default=50)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def build(args):
+    import analytics
+    rng = np.random.default_rng(args.seed)
+    end = date.today()
+    columns = {
+        "order_id": np.sort(rng.integers(1, args.lines // 3 + 2, args.lines)).astype(np.int32),
+        "item_id": rng.integers(1, args.items + 1, args.lines).astype(np.int32),
+        "day": (end.toordinal() - rng.integers(0, args.days, args.lines)).astype(np.int32),
+        "quantity": rng.integers(1, 10, args.lines).astype(np.int32),
+        "subtotal": rng.uniform(10, 5000, args.lines),
+    }
+    item_types = np.concatenate([[-1], rng.integers(0, args.item_types, args.items)]).astype(np.int32)
+    type_names = [f"Type {n}" for n in range(args.item_types)]
+    item_names = {item_id: f"Item {item_id}" for item_id in range(1, args.items + 1)}
+    return analytics.Lines(columns, item_types, type_names, item_names), end
+
+def main():
+    args = parse_args()
+    import analytics
+
+    lines, end = build(args)
+    size = sum(getattr(lines, name).nbytes for name in analytics.COLUMNS)
+    print(f"{lines.size} lines, {size / lines.size:.0f} bytes per line, {size / 2**20:.0f} MiB")
+    last_quarter = end - timedelta(days=90)
+    reports = {
+        "revenue by type": lambda: analytics.revenue_by_type(lines),
+        "revenue by type, 90 days": lambda: analytics.revenue_by_type(lines, last_quarter),
+        "top 10 items by revenue": lambda: analytics.top_items(lines, "revenue", 10),
+        "top 10 items of a type": lambda: analytics.top_items(lines, "quantity", 10, item_type="Type 3"),
+        "daily sales": lambda: analytics.timeseries(lines, "day"),
+        "monthly sales": lambda: analytics.timeseries(lines, "month"),
+        "daily sales of an item": lambda: analytics.timeseries(lines, "day", item_id=1),
+    }
+    for name, report in reports.items():
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            report()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<28}{best * 1000:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput of POST /api/orders/bulk against looping over POST /api/orders
+
+    python -m benchmarks.bulk_orders --orders 2000 --batch-size 500
+
+Both paths run in-process through the FastAPI test client against the same
+database (a temporary SQLite file unless DATABASE_URL is set; the target is
+wiped, so use a scratch database). The statements each bulk request sends
+are counted too: on a server database each is a round trip.
+"""
+import argparse
+import random
+import time
+from benchmarks.common import use_scratch_database
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--max-lines", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def make_orders(rng: random.Random, item_ids: list[int], count: int, max_lines: int) -> list[dict]:
+    return [
+        {"items": [{"item_id": item_id, "quantity": rng.randint(1, 3)}
+                   for item_id in rng.sample(item_ids, rng.randint(1, max_lines))]}
+        for _ in range(count)
+    ]
+
+def main():
+    args = parse_args()
+    use_scratch_database("bulk_orders")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from database import SessionLocal, engine
+    import migrations
+    import models
+    import main as app_module
+
+    models.Base.metadata.drop_all(bind=engine)
+    migrations.migrate(engine)
+    db = SessionLocal()
+    items = [models.Item(name=f"Bench Item {i}", item_type="Bench", cost=1.0 + i) for i in range(args.items)]
+    db.add_all(items)
+    db.flush()
+    db.add_all([models.Inventory(item_id=item.id, quantity=10 ** 9) for item in items])
+    db.commit()
+    item_ids = [item.id for item in items]
+    db.close()
+
+    client = TestClient(app_module.app)
+    rng = random.Random(args.seed)
+
+    orders = make_orders(rng, item_ids, args.orders, args.max_lines)
+    started = time.perf_counter()
+    for order in orders:
+        assert client.post("/api/orders", json=order).status_code == 200
+    single = time.perf_counter() - started
+
+    orders = make_orders(rng, item_ids, args.orders, args.max_lines)
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    for i in range(0, len(orders), args.batch_size):
+        response = client.post("/api/orders/bulk", json={"orders": orders[i:i + args.batch_size]})
+        assert response.status_code == 200 and response.json()["failed"] == 0
+    bulk = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", count)
+    requests = -(-args.orders // args.batch_size)
+
+    print(f"{args.orders} orders, up to {args.max_lines} lines each, on {engine.dialect.name}")
+    print(f"POST /api/orders loop:      {single:8.2f}s  {args.orders / single:10.1f} orders/s")
+    print(f"POST /api/orders/bulk x{args.batch_size}: {bulk:8.2f}s  {args.orders / bulk:10.1f} orders/s")
+    print(f"speedup: {single / bulk:.1f}x")
+    print(f"statements per bulk request: {statements / requests:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+import os
+import tempfile
+
+def use_scratch_database(name: str) -> str:
+    """Point DATABASE_URL at a fresh temporary SQLite file unless it is already set.
+
+    Must run before ``database`` is imported.
+    """
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return os.environ["DATABASE_URL"]
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
@@ -0,0 +1,59 @@
+"""
+Forecast computation time for a synthetic catalog, without a database
+
+Builds the coordinate-form demand ``forecast.load_demand`` returns for
+``--items`` items over ``--days`` days, where each item sells on a
+``--density`` fraction of the days, and times the vectorized statistics and
+the ranking of the most urgent items.
+
+    python -m benchmarks.forecast --items 100000 --days 730 --density 0.2
+"""
+import argparse
+import time
+import numpy as np
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of (item, day) pairs with sales")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def build(args):
+    import forecast
+    rng = np.random.default_rng(args.seed)
+    pairs = int(args.items * args.days * args.density)
+    # Sampled with replacement: a few duplicate (item, day) pairs do not change the cost
+    cells = rng.integers(0, args.items * args.days, pairs)
+    # Newest first, the order load_demand reads the rollups in
+    cells = cells[np.argsort(cells % args.days, kind="stable")]
+    item_index, age = np.divmod(cells, args.days)
+    quantity = rng.poisson(3, pairs).astype(np.float64) + 1
+    item_ids = np.arange(1, args.items + 1, dtype=np.int64)
+    stock = rng.integers(0, 500, args.items).astype(np.float64)
+    return forecast.Demand(item_ids, stock, item_index, age, quantity, args.days)
+
+def main():
+    args = parse_args()
+    import forecast
+
+    demand = build(args)
+    print(f"{args.items} items x {args.days} days, {len(demand.quantity)} (item, day) pairs")
+    best = {"forecast": None, "ranked": None}
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = forecast.forecast(demand)
+        computed = time.perf_counter()
+        rows = forecast.ranked(demand, result, low_stock_only=True, limit=args.limit)
+        finished = time.perf_counter()
+        for name, elapsed in (("forecast", computed - started), ("ranked", finished - computed)):
+            best[name] = elapsed if best[name] is None else min(best[name], elapsed)
+    for name, elapsed in best.items():
+        print(f"{name:<10}{elapsed * 1000:>9.1f} ms")
+    print(f"{int(result['low_stock'].sum())} low stock items; most urgent: {rows[0] if rows else None}")
+
+if __name__ == "__main__":
+    main()
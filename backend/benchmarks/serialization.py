@@ -0,0 +1,93 @@
+"""
+Response size and serialization time: validated vs fast vs normalized
+
+Builds large in-memory order and inventory pages from transient ORM objects
+(no database needed) and encodes them the way each response mode does:
+
+  validated   response_model validation + jsonable_encoder + json.dumps
+  fast        serializers.*_payload + orjson (?fast=true)
+  normalized  items side table + orjson (?normalized=true)
+
+    python -m benchmarks.serialization --orders 1000 --lines 20 --items 200
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=20, help="lines per order")
+    parser.add_argument("--items", type=int, default=200, help="distinct items")
+    parser.add_argument("--inventory", type=int, default=5000, help="inventory rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def build(args):
+    import models
+    rng = random.Random(args.seed)
+    now = datetime(2024, 1, 1)
+    items = [
+        models.Item(id=i, name=f"Item {i}", item_type=f"Type {i % 12}", cost=round(rng.uniform(10, 5000), 2),
+                    description="Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 3,
+                    created_at=now, updated_at=now)
+        for i in range(1, args.items + 1)
+    ]
+    orders = []
+    line_id = 1
+    for order_id in range(1, args.orders + 1):
+        order = models.Order(id=order_id, order_date=now + timedelta(minutes=order_id), total_amount=0.0, created_at=now)
+        for item in rng.sample(items, min(args.lines, len(items))):
+            quantity = rng.randint(1, 5)
+            order.order_items.append(models.OrderItem(id=line_id, item_id=item.id, item=item, quantity=quantity,
+                                                      unit_price=item.cost, subtotal=item.cost * quantity))
+            line_id += 1
+        orders.append(order)
+    inventory = [
+        models.Inventory(id=i, item_id=items[i % len(items)].id, item=items[i % len(items)], quantity=i % 50,
+                         created_at=now, updated_at=now)
+        for i in range(1, args.inventory + 1)
+    ]
+    return orders, inventory
+
+def timed(fn, repeat: int):
+    best = None
+    body = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+def main():
+    args = parse_args()
+    import schemas
+    import serializers
+
+    orders, inventory = build(args)
+    cases = [
+        ("orders", orders, TypeAdapter(list[schemas.OrderResponse]), serializers.orders_payload),
+        ("inventory", inventory, TypeAdapter(list[schemas.InventoryResponse]), serializers.inventory_payload),
+    ]
+    print(f"{args.orders} orders x {args.lines} lines, {args.inventory} inventory rows, {args.items} distinct items")
+    print(f"{'listing':<10}{'mode':<12}{'ms':>10}{'bytes':>12}{'gzip bytes':>12}")
+    for name, rows, adapter, payload in cases:
+        modes = [
+            ("validated", lambda: json.dumps(jsonable_encoder(adapter.validate_python(rows, from_attributes=True))).encode()),
+            ("fast", lambda: orjson.dumps(payload(rows))),
+            ("normalized", lambda: orjson.dumps(payload(rows, True))),
+        ]
+        for mode, fn in modes:
+            elapsed, body = timed(fn, args.repeat)
+            print(f"{name:<10}{mode:<12}{elapsed * 1000:>10.1f}{len(body):>12}{len(gzip.compress(body, 6)):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+One-time database bootstrap: schema migrations, demo data and rollup backfill
+
+Nothing here runs at import time. The app runs ``initialize()`` from its
+lifespan only when DB_AUTO_INIT is set, and concurrent workers serialize on a
+lock (MySQL GET_LOCK, or a file lock for SQLite) so the work is done by the
+first worker while the others find it already done. Deployments can instead
+run it once before starting the workers:
+
+    python bootstrap.py
+"""
+from contextlib import contextmanager
+import hashlib
+import os
+import tempfile
+import time
+from sqlalchemy import text
+from database import SessionLocal, engine
+import migrations
+import models
+import rollups
+
+DB_AUTO_INIT = os.getenv("DB_AUTO_INIT", "").lower() in ("1", "true", "yes")
+DB_INIT_TIMEOUT = float(os.getenv("DB_INIT_TIMEOUT", "60"))  # seconds to wait for the database and the lock
+LOCK_NAME = "medical_inventory_bootstrap"
+
+def wait_for_database(timeout: float = DB_INIT_TIMEOUT):
+    """Retry connecting with backoff until the database answers or ``timeout`` passes"""
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return
+        except Exception:
+            if time.monotonic() + delay > deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+@contextmanager
+def bootstrap_lock(timeout: float = DB_INIT_TIMEOUT):
+    """Hold a lock shared by every worker process using this database"""
+    if engine.dialect.name == "mysql":
+        with engine.connect() as conn:
+            acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": int(timeout)}).scalar()
+            if acquired != 1:
+                raise TimeoutError(f"Could not acquire the {LOCK_NAME} lock within {timeout}s")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+        return
+
+    import fcntl
+    digest = hashlib.sha1(str(engine.url).encode()).hexdigest()[:12]
+    path = os.path.join(tempfile.gettempdir(), f"{LOCK_NAME}-{digest}.lock")
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def initialize():
+    """Migrate the schema, seed an empty database and backfill rollups"""
+    wait_for_database()
+    with bootstrap_lock():
+        migrations.migrate(engine)
+        db = SessionLocal()
+        try:
+            if db.query(models.Item.id).first() is None:
+                import seed_data
+                print("Database is empty, seeding initial data...")
+                seed_data.seed_database()
+            # Backfill weekly stats rollups for databases created before they existed
+            rollups.ensure_built(db)
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    initialize()
+    print(f"Database initialized in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,173 @@
+"""
+In-process cache of the item catalog
+
+The items table is small and read-heavy, so lookups by id are served from a
+bounded LRU with a TTL. Write-path checks such as name uniqueness read the
+database instead, since another worker's entries may be stale. The item endpoints invalidate entries
+after every committed write. When uvicorn runs several workers, set
+CATALOG_CACHE_REDIS_URL to broadcast invalidations to the other processes over
+Redis pub/sub; without it the TTL bounds how stale another worker can be.
+"""
+from collections import OrderedDict
+from typing import Optional
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from sqlalchemy.orm import Session
+import models
+import schemas
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "10000"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))  # seconds
+CATALOG_CACHE_REDIS_URL = os.getenv("CATALOG_CACHE_REDIS_URL")
+INVALIDATION_CHANNEL = "catalog-cache-invalidations"
+
+class CatalogCache:
+    def __init__(self, max_size: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, schemas.ItemResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that started before an
+        # invalidation must not repopulate the cache with what it read
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.channel = None
+
+    def _get(self, item_id: int) -> Optional[schemas.ItemResponse]:
+        entry = self._entries.get(item_id)
+        if entry is None:
+            return None
+        expires_at, item = entry
+        if expires_at < time.monotonic():
+            self._remove(item_id)
+            return None
+        self._entries.move_to_end(item_id)
+        return item
+
+    def _remove(self, item_id: int):
+        self._entries.pop(item_id, None)
+
+    def _put(self, items, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            expires_at = time.monotonic() + self.ttl
+            for item in items:
+                self._remove(item.id)
+                self._entries[item.id] = (expires_at, item)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_many(self, db: Session, item_ids) -> dict[int, schemas.ItemResponse]:
+        """Items by id; misses are loaded with a single IN query"""
+        item_ids = set(item_ids)
+        found = {}
+        with self._lock:
+            generation = self._generation
+            for item_id in item_ids:
+                item = self._get(item_id)
+                if item is not None:
+                    found[item_id] = item
+            missing = item_ids - found.keys()
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            loaded = [
+                schemas.ItemResponse.model_validate(item)
+                for item in db.query(models.Item).filter(models.Item.id.in_(missing))
+            ]
+            # Rows read from a replica may predate a write the cache was invalidated for
+            if not db.info.get("replica"):
+                self._put(loaded, generation)
+            found.update((item.id, item) for item in loaded)
+        return found
+
+    def get(self, db: Session, item_id: int) -> Optional[schemas.ItemResponse]:
+        return self.get_many(db, [item_id]).get(item_id)
+
+    def invalidate(self, item_id: Optional[int] = None, broadcast: bool = True):
+        """Drop one item (or everything when ``item_id`` is None)"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if item_id is None:
+                self._entries.clear()
+            else:
+                self._remove(item_id)
+        if broadcast and self.channel is not None:
+            self.channel.publish(item_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "cross_process": self.channel is not None,
+            }
+
+class RedisInvalidationChannel:
+    """Relays invalidations between worker processes over Redis pub/sub"""
+
+    def __init__(self, url: str, cache: CatalogCache):
+        try:
+            import redis  # optional dependency, only needed for multi-worker deployments
+        except ImportError:
+            raise RuntimeError("CATALOG_CACHE_REDIS_URL is set but the redis package is not installed "
+                               "(pip install -r requirements-dev.txt)") from None
+        self.client = redis.Redis.from_url(url)
+        # Fail at startup rather than let workers serve stale items until the TTL
+        self.client.ping()
+        self.cache = cache
+        self.origin = uuid.uuid4().hex
+        self._thread = None
+
+    def publish(self, item_id: Optional[int]):
+        try:
+            self.client.publish(INVALIDATION_CHANNEL, json.dumps({"origin": self.origin, "item_id": item_id}))
+        except Exception as e:
+            # Other workers fall back to TTL expiry for this change
+            logger.warning("Could not publish catalog invalidation: %s", e)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._listen, name="catalog-cache-invalidations", daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages may have been missed while disconnected
+                self.cache.invalidate(broadcast=False)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    if payload["origin"] != self.origin:
+                        self.cache.invalidate(payload["item_id"], broadcast=False)
+            except Exception as e:
+                logger.warning("Catalog invalidation listener reconnecting: %s", e)
+                time.sleep(1.0)
+
+catalog_cache = CatalogCache()
+
+def start_invalidation_listener():
+    """Join the cross-process invalidation channel when CATALOG_CACHE_REDIS_URL is set"""
+    if CATALOG_CACHE_REDIS_URL and catalog_cache.channel is None:
+        catalog_cache.channel = RedisInvalidationChannel(CATALOG_CACHE_REDIS_URL, catalog_cache)
+        catalog_cache.channel.start()
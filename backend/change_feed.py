@@ -0,0 +1,294 @@
+"""
+Real-time change feed of items, inventory and orders over server-sent events
+
+Writes append events to ``change_events`` in the same transaction as the
+change they describe: item create, update and delete in main.py and the item
+import, every stock change in stock.py and new orders in order_service.py. An
+event carries the new state of its row (``upsert``) or only its key
+(``delete``), so applying an event twice is harmless and a client may resume
+from an earlier point than it needs to. The event id is its sequence number.
+
+Each process runs one poller that reads the events after its position every
+CHANGE_FEED_POLL_SECONDS, encodes each event once and hands it to every open
+stream in the process: one primary-key range query per interval however many
+dashboards are open. Transactions commit out of id order, so the poller stops
+at a missing sequence number while the transaction that took it may still
+commit: it was taken before the event that follows the gap was written, so
+the poller gives up on it once that event's ``occurred_at`` is
+CHANGE_FEED_GAP_SECONDS old (a rolled-back transaction never fills its gap).
+Gaps are only waited on as long as they are fresh; a poller catching up on
+older events skips theirs at once. A transaction can still commit a skipped
+id later (one that waited on a lock, say), after the streams have moved past
+it. The poller re-checks skipped ids for CHANGE_FEED_RETENTION_SECONDS, and
+when one shows up it sends ``reset`` to the open streams and to clients
+resuming from before it, instead of letting their dashboards drift.
+
+Clients load ``GET /api/dashboard`` (items, inventory and ``sequence``, the
+poller's position taken before the reads; the first request or poll seeds
+it) and then open ``GET /api/changes?since=<sequence>``. Events after ``since`` are replayed from the
+table, then live ones follow; a reconnecting EventSource sends Last-Event-ID
+instead. Sequence numbers come from the database, so a client can reconnect
+to any worker. A client that asks for events already pruned
+(CHANGE_FEED_RETENTION_SECONDS) or falls CHANGE_FEED_QUEUE_SIZE events behind
+gets a ``reset`` event and reloads the dashboard.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+import os
+import threading
+import time
+import orjson
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+import models
+import serializers
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "0.5"))  # 0 disables the poller
+CHANGE_FEED_GAP_SECONDS = float(os.getenv("CHANGE_FEED_GAP_SECONDS", "5"))
+CHANGE_FEED_RETENTION_SECONDS = float(os.getenv("CHANGE_FEED_RETENTION_SECONDS", "86400"))
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "10000"))  # events buffered per stream
+HEARTBEAT_SECONDS = 15
+PRUNE_INTERVAL = 60  # seconds
+BATCH_SIZE = 1000
+IN_CHUNK_SIZE = 1000
+
+# The compression middleware would hold events back in its buffer, and
+# proxies must not buffer the stream either
+STREAM_HEADERS = {"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+RESET = "event: reset\ndata: {}\n\n"
+HEARTBEAT = ": keepalive\n\n"
+
+Event = models.ChangeEvent
+
+def _insert(db: Session, kind: str, events: list[tuple[str, int, Optional[dict]]]):
+    if events:
+        occurred_at = datetime.now()
+        db.execute(insert(Event), [{"kind": kind, "action": action, "key": key, "occurred_at": occurred_at,
+                                    "data": None if data is None else orjson.dumps(data).decode()}
+                                   for action, key, data in events])
+
+def items_changed(db: Session, items):
+    """Record the current state of ``items`` (ORM rows or ItemResponse)"""
+    _insert(db, "item", [("upsert", item.id, serializers.item_dict(item)) for item in items])
+
+def item_deleted(db: Session, item_id: int):
+    _insert(db, "item", [("delete", item_id, None)])
+
+def inventory_changed(db: Session, item_ids):
+    """Record the stock rows of ``item_ids`` as they are now; items without one are deleted"""
+    item_ids = sorted(set(item_ids))
+    inv = models.Inventory
+    for i in range(0, len(item_ids), IN_CHUNK_SIZE):
+        chunk = item_ids[i:i + IN_CHUNK_SIZE]
+        rows = {row.item_id: row for row in db.execute(
+            select(inv.id, inv.item_id, inv.quantity, inv.created_at, inv.updated_at).where(inv.item_id.in_(chunk)))}
+        _insert(db, "inventory", [("upsert", item_id, serializers.inventory_row(rows[item_id])) if item_id in rows
+                                  else ("delete", item_id, None) for item_id in chunk])
+
+def orders_created(db: Session, orders: list[models.Order]):
+    _insert(db, "order", [("upsert", order.id, {"id": order.id, "order_date": order.order_date,
+                                                "total_amount": order.total_amount}) for order in orders])
+
+def _encode(row) -> str:
+    data = row.data if row.data is not None else "null"
+    return (f'id: {row.id}\ndata: {{"seq":{row.id},"type":"{row.kind}","action":"{row.action}",'
+            f'"key":{row.key},"data":{data}}}\n\n')
+
+def _latest_id(db: Session) -> int:
+    return db.execute(select(func.coalesce(func.max(Event.id), 0))).scalar()
+
+def _latest() -> int:
+    with SessionLocal() as db:
+        return _latest_id(db)
+
+def _fetch(after: int, until: Optional[int] = None) -> list:
+    conditions = [Event.id > after]
+    if until is not None:
+        conditions.append(Event.id <= until)
+    with SessionLocal() as db:
+        return db.execute(select(Event.id, Event.kind, Event.action, Event.key, Event.data, Event.occurred_at).where(
+            *conditions).order_by(Event.id).limit(BATCH_SIZE)).all()
+
+def _committed(event_ids: list[int]) -> list[int]:
+    """Which of ``event_ids`` exist now"""
+    found = []
+    with SessionLocal() as db:
+        for i in range(0, len(event_ids), IN_CHUNK_SIZE):
+            found += db.execute(select(Event.id).where(Event.id.in_(event_ids[i:i + IN_CHUNK_SIZE]))).scalars()
+    return found
+
+def _pruned(since: int, position: int) -> bool:
+    """Whether events after ``since`` have been pruned"""
+    with SessionLocal() as db:
+        oldest = db.execute(select(func.min(Event.id))).scalar()
+    return since < position if oldest is None else since < oldest - 1
+
+def _prune():
+    with SessionLocal() as db:
+        cutoff = datetime.now() - timedelta(seconds=CHANGE_FEED_RETENTION_SECONDS)
+        # The newest event stays: its time is the Last-Modified of deletes (see conditional.py)
+        latest = db.execute(select(func.max(Event.id))).scalar()
+        db.execute(delete(Event).where(Event.occurred_at < cutoff, Event.id < latest))
+        db.commit()
+
+class Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(CHANGE_FEED_QUEUE_SIZE)
+        # Set when the stream missed events: it overflowed or one committed late
+        self.stale = False
+
+    def push(self, sequence: int, message: str):
+        try:
+            self.queue.put_nowait((sequence, message))
+        except asyncio.QueueFull:
+            self.stale = True
+
+    def reset(self):
+        self.stale = True
+        # Wake the stream; a full queue ends it at its next event anyway
+        try:
+            self.queue.put_nowait((0, RESET))
+        except asyncio.QueueFull:
+            pass
+
+class Feed:
+    def __init__(self):
+        # Highest sequence number handed to the streams; every event up to it
+        # is committed (or was given up on after CHANGE_FEED_GAP_SECONDS)
+        self.position: Optional[int] = None
+        self._subscribers: set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._task = None
+        # Skipped sequence numbers -> when to stop checking for them
+        self._skipped: dict[int, float] = {}
+        # Position when a skipped event was last found committed; clients
+        # resuming from before it may have missed that event
+        self._late_position = 0
+        self.delivered = 0
+        self.gaps_skipped = 0
+        self.late_events = 0
+
+    def start(self):
+        """Start this process's poller on the running event loop, when enabled"""
+        if CHANGE_FEED_POLL_SECONDS > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        next_prune = 0.0
+        while True:
+            try:
+                if self.position is None:
+                    self._seed(await run_in_threadpool(_latest))
+                delivered = self._deliver(await run_in_threadpool(_fetch, self.position))
+                if self._skipped:
+                    self._found_late(await run_in_threadpool(_committed, sorted(self._skipped)))
+                if time.monotonic() >= next_prune:
+                    await run_in_threadpool(_prune)
+                    next_prune = time.monotonic() + PRUNE_INTERVAL
+            except Exception:
+                logger.exception("change feed poll failed")
+                delivered = 0
+            # Catch up without sleeping while full batches go out
+            if delivered < BATCH_SIZE:
+                await asyncio.sleep(CHANGE_FEED_POLL_SECONDS)
+
+    def seed(self, db: Session) -> int:
+        """The position, read from ``db`` when neither the poller nor an earlier request has set it"""
+        if self.position is None:
+            self._seed(_latest_id(db))
+        return self.position
+
+    def _seed(self, latest: int):
+        # Streams start at the events committed from now on; whichever of
+        # the poller and a dashboard request gets here first sets it
+        with self._lock:
+            if self.position is None:
+                self.position = latest
+
+    def _deliver(self, rows: list) -> int:
+        delivered = 0
+        expired = datetime.now() - timedelta(seconds=CHANGE_FEED_GAP_SECONDS)
+        for row in rows:
+            # Each gap is waited on until the event after it is old enough
+            if row.id != self.position + 1:
+                if row.occurred_at > expired:
+                    break
+                self.gaps_skipped += 1
+                until = time.monotonic() + CHANGE_FEED_RETENTION_SECONDS
+                self._skipped.update(dict.fromkeys(range(self.position + 1, row.id), until))
+            self.position = row.id
+            message = _encode(row)
+            for subscriber in self._subscribers:
+                subscriber.push(row.id, message)
+            delivered += 1
+        self.delivered += delivered
+        return delivered
+
+    def _found_late(self, event_ids: list[int]):
+        """Reset the streams when skipped events have since been committed"""
+        now = time.monotonic()
+        for event_id in event_ids:
+            del self._skipped[event_id]
+        self._skipped = {event_id: until for event_id, until in self._skipped.items() if until > now}
+        if event_ids:
+            logger.warning("change feed events %s committed after they were skipped", event_ids)
+            self.late_events += len(event_ids)
+            self._late_position = self.position
+            for subscriber in self._subscribers:
+                subscriber.reset()
+
+    async def stream(self, since: Optional[int]):
+        """The SSE body for a client that has seen the events up to ``since``"""
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        # Live events arrive after this position; earlier ones are replayed
+        position = self.position
+        last = since if since is not None else position
+        try:
+            if since is not None and since < self._late_position:
+                yield RESET
+                return
+            if since is not None and position is not None and since < position:
+                if await run_in_threadpool(_pruned, since, position):
+                    yield RESET
+                    return
+                while last < position:
+                    rows = await run_in_threadpool(_fetch, last, position)
+                    for row in rows:
+                        yield _encode(row)
+                    if len(rows) < BATCH_SIZE:
+                        break
+                    last = rows[-1].id
+                last = position
+            while True:
+                try:
+                    sequence, message = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if subscriber.stale:
+                    yield RESET
+                    return
+                if last is None or sequence > last:
+                    last = sequence
+                    yield message
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {"position": self.position, "streams": len(self._subscribers), "delivered": self.delivered,
+                "gaps_skipped": self.gaps_skipped, "skipped_pending": len(self._skipped),
+                "late_events": self.late_events}
+
+feed = Feed()
@@ -0,0 +1,109 @@
+"""
+HTTP conditional GET support for the list endpoints
+
+The validator for a listing is derived from cheap aggregates over the tables it
+reads (row count, max id and max created/updated timestamps) plus the request's
+query string, all fetched with one SELECT. Orders are never updated or
+deleted, so their max id and created_at identify them without the row count,
+which would scan the whole table. When the client's If-None-Match
+matches, the endpoint answers 304 before loading or serializing any rows.
+
+Last-Modified is the latest of those timestamps and, for tables rows are
+deleted from, of the change feed's events, which record the deletes (see
+change_feed.py). A request with If-Modified-Since and no If-None-Match gets a
+304 when nothing changed after that date. HTTP dates have one-second
+precision, so Last-Modified is only sent once its second has passed; a later
+change then always falls in a later second.
+
+Timestamps have one-second precision on MySQL, so two edits to the same table
+within one second that leave the aggregates unchanged can share an ETag until
+the next change; inventory also folds in sum(quantity) to cover stock edits.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+import hashlib
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+import models
+
+# Tables whose rows are only ever inserted: a new row raises max(id)
+APPEND_ONLY = {models.Order}
+
+def _aggregates(model) -> list:
+    columns = [func.max(model.id), func.max(model.created_at)]
+    if model not in APPEND_ONLY:
+        # Deleting a row below the max id changes only the count
+        columns.insert(0, func.count())
+    if hasattr(model, "updated_at"):
+        columns.append(func.max(model.updated_at))
+    if model is models.Inventory:
+        columns.append(func.sum(model.quantity))
+    return [select(column).select_from(model).scalar_subquery() for column in columns]
+
+def fingerprint(db: Session, *tables) -> list:
+    """Aggregate values identifying the current contents of ``tables``"""
+    return list(db.execute(select(*[agg for model in tables for agg in _aggregates(model)])).one())
+
+def _validators(db: Session, tables: tuple) -> tuple[list, list]:
+    """``fingerprint`` and the timestamps Last-Modified is taken from, in one SELECT.
+
+    When rows can be deleted the latter include the latest change event; it
+    is left out of the ETag, which the row count already covers, so other
+    writes do not invalidate it.
+    """
+    aggregates = [agg for model in tables for agg in _aggregates(model)]
+    count = len(aggregates)
+    if any(model not in APPEND_ONLY for model in tables):
+        aggregates.append(select(func.max(models.ChangeEvent.occurred_at)).scalar_subquery())
+    row = list(db.execute(select(*aggregates)).one())
+    return row[:count], row
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _last_modified(values: list) -> Optional[datetime]:
+    stamps = [_utc(v) for v in values if isinstance(v, datetime)]
+    if not stamps:
+        return None
+    latest = max(stamps).replace(microsecond=0)
+    # A change later in the same second would get the same HTTP date
+    if latest + timedelta(seconds=1) > datetime.now(timezone.utc):
+        return None
+    return latest
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and last_modified <= since
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/"x" matches "x"
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+def check(request: Request, response: Response, db: Session, *tables) -> Optional[Response]:
+    """Set validators on ``response``; return a 304 response when the client's copy is current"""
+    values, stamps = _validators(db, tables)
+    digest = hashlib.sha1(repr((request.url.path, request.url.query, values)).encode()).hexdigest()[:20]
+    # Weak because compression changes the bytes but not the meaning
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    last_modified = _last_modified(stamps)
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if _matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None:
+        # If-None-Match takes precedence when both are sent
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and _not_modified_since(if_modified_since, last_modified):
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,26 +1,95 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-
-# Database connection
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_USER = os.getenv("DB_USER", "meduser")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "medpass")
-DB_NAME = os.getenv("DB_NAME", "medical_inventory")
-
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base = declarative_base()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+import functools
+import os
+from metrics import pool_options
+
+# Database connection
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_USER = os.getenv("DB_USER", "meduser")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "medpass")
+DB_NAME = os.getenv("DB_NAME", "medical_inventory")
+
+# DATABASE_URL overrides the MySQL settings, e.g. sqlite:///./inventory.db for local runs
+DATABASE_URL = os.getenv("DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+
+# DB_MODE=async serves requests through an AsyncEngine (aiomysql / aiosqlite)
+# instead of running blocking sessions in the threadpool
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+ASYNC_MODE = DB_MODE == "async"
+
+def to_async_url(url: str) -> str:
+    """Swap the blocking driver in ``url`` for its asyncio counterpart"""
+    if url.startswith("mysql+pymysql://") or url.startswith("mysql://"):
+        return "mysql+aiomysql://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Connection pool settings, per engine and per process: with N uvicorn workers
+# the database sees up to N x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+# Size and overflow apply to queue pools; SQLite pools that never wait ignore them
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))  # seconds before a connection is replaced
+
+def engine_options(url: str) -> dict:
+    """``create_engine`` / ``create_async_engine`` keyword arguments for ``url``"""
+    options = {"pool_pre_ping": True, "pool_recycle": DB_POOL_RECYCLE, **pool_options(url)}
+    if "poolclass" in options:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    if make_url(url).drivername in ("sqlite", "sqlite+pysqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The sync engine above always exists for scripts, seeding and streaming exports
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_MODE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    # Responses are serialized after the endpoint returns, outside the
+    # greenlet, so committed objects must stay loaded
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+def get_sync_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Request dependency for the configured DB_MODE
+get_db = get_async_db if ASYNC_MODE else get_sync_db
+
+def db_endpoint(func):
+    """Serve a sync endpoint taking ``db: Session`` as an ``async def`` endpoint.
+
+    In async mode the body runs on the event loop through
+    ``AsyncSession.run_sync``, so all database I/O goes through the async
+    driver; in sync mode it runs in the threadpool exactly as a plain ``def``
+    endpoint would.
+    """
+    @functools.wraps(func)
+    async def endpoint(*args, **kwargs):
+        if ASYNC_MODE:
+            return await kwargs["db"].run_sync(lambda session: func(*args, **{**kwargs, "db": session}))
+        return await run_in_threadpool(func, *args, **kwargs)
+    return endpoint
@@ -0,0 +1,92 @@
+"""
+Streaming export of the full order history
+
+One joined query over orders, order_items and items is streamed through a
+server-side cursor (``yield_per`` with ``stream_results``), encoded to CSV or
+NDJSON in chunks and handed to a ``StreamingResponse``. Memory stays constant
+however many order lines there are.
+"""
+from datetime import date, datetime, time
+from typing import Iterator, Literal, Optional, Union
+import csv
+import io
+import json
+from sqlalchemy import select
+from database import SessionLocal
+import models
+
+ExportFormat = Literal["csv", "ndjson"]
+
+YIELD_PER = 2000  # rows fetched from the server-side cursor at a time
+
+EXPORT_COLUMNS = [
+    "order_id", "order_date", "total_amount",
+    "order_item_id", "item_id", "item_name", "quantity", "unit_price", "subtotal",
+]
+
+def as_datetime(value: Optional[Union[datetime, date]]) -> Optional[datetime]:
+    """Dates in the filters mean midnight at the start of that day"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+def export_rows(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                session_factory=SessionLocal) -> Iterator[tuple]:
+    """Order lines (orders without lines once, with empty line columns) in order id order.
+
+    Opens its own session: the response body is produced after the request's
+    dependencies have been torn down.
+    """
+    stmt = select(
+        models.Order.id, models.Order.order_date, models.Order.total_amount,
+        models.OrderItem.id, models.OrderItem.item_id, models.Item.name,
+        models.OrderItem.quantity, models.OrderItem.unit_price, models.OrderItem.subtotal,
+    ).outerjoin(
+        models.OrderItem, models.OrderItem.order_id == models.Order.id
+    ).outerjoin(
+        models.Item, models.Item.id == models.OrderItem.item_id
+    ).order_by(models.Order.id, models.OrderItem.id)
+    if start is not None:
+        stmt = stmt.where(models.Order.order_date >= start)
+    if end is not None:
+        stmt = stmt.where(models.Order.order_date < end)
+
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=YIELD_PER))
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def stream_csv(rows: Iterator[tuple], chunk_rows: int = YIELD_PER) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([_value(v) for v in row])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def stream_ndjson(rows: Iterator[tuple], chunk_rows: int = YIELD_PER) -> Iterator[str]:
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row)))))
+        if len(chunk) >= chunk_rows:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+def stream_export(fmt: ExportFormat, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  session_factory=SessionLocal) -> Iterator[str]:
+    rows = export_rows(start, end, session_factory)
+    return stream_csv(rows) if fmt == "csv" else stream_ndjson(rows)
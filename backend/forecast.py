@@ -0,0 +1,134 @@
+"""
+Demand forecasting and reorder points for every stocked item at once
+
+Daily demand is read from the per-(day, item) rollups, which hold the summed
+``order_items`` quantities of each order day, in one bulk query and kept in
+coordinate form: three parallel arrays (item index, day index, quantity), one
+entry per day an item sold, newest first. Every statistic is then a weighted
+``bincount`` over a prefix of those arrays, so the cost grows with the number
+of recent (day, item) pairs rather than items x days and there is no per-item
+Python loop:
+
+- trailing moving averages over the last 7, 28 and 90 days;
+- exponential smoothing (EWMA), used as the demand velocity in units per day;
+  sales old enough to weigh less than ``EWMA_CUTOFF`` are skipped;
+- the standard deviation of daily demand over the last 28 days;
+- days of cover (stock / velocity) and a reorder point of lead-time demand
+  plus safety stock (``safety_factor`` standard deviations over the lead time).
+
+An item is flagged ``low_stock`` when its current ``Inventory.quantity`` (0
+for items that sold out and lost their stock row) is at or below its reorder
+point, which includes every item that is out of stock.
+"""
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import models
+
+WINDOWS = (7, 28, 90)
+VOLATILITY_WINDOW = 28
+
+class Demand:
+    """Daily demand of the stocked items over ``days`` days ending today
+
+    ``quantity[k]`` units of ``item_ids[item_index[k]]`` sold ``age[k]`` days
+    ago; ``stock`` is the current quantity of each of ``item_ids``. Entries are
+    sorted by age, so the demand of the last N days is a prefix of the arrays.
+    """
+
+    def __init__(self, item_ids: np.ndarray, stock: np.ndarray, item_index: np.ndarray, age: np.ndarray,
+                 quantity: np.ndarray, days: int):
+        self.item_ids = item_ids
+        self.stock = stock
+        self.item_index = item_index
+        self.age = age
+        self.quantity = quantity
+        self.days = days
+
+def _sales(start: date, end: date):
+    rollup = models.DailyItemRollup
+    return select(rollup.item_id, rollup.day, rollup.quantity).where(
+        rollup.day >= start, rollup.day <= end, rollup.item_id.in_(select(models.Item.id))
+    ).order_by(rollup.day.desc())
+
+def load_demand(db: Session, days: int, end: date = None) -> Demand:
+    """Stock levels and the daily demand of the ``days`` days up to ``end`` (today), in two queries
+
+    Items are those with a stock row or with sales in the window: stock rows
+    are deleted when they reach zero, so an item that sold out has only sales
+    and is forecast with a quantity of 0. Sales of items since deleted from the
+    catalog are left out, so they never take a place in the ranking.
+    """
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    stock = db.execute(select(models.Inventory.item_id, models.Inventory.quantity)).all()
+    stocked_ids = np.fromiter((row[0] for row in stock), np.int64, len(stock))
+    stocked_quantities = np.fromiter((row[1] for row in stock), np.float64, len(stock))
+
+    rows = db.execute(_sales(start, end)).all()
+    ids = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+    ordinals = np.fromiter((row[1].toordinal() for row in rows), np.int64, len(rows))
+    sold = np.fromiter((row[2] for row in rows), np.float64, len(rows))
+
+    item_ids = np.union1d(stocked_ids, ids)
+    quantities = np.zeros(len(item_ids))
+    quantities[np.searchsorted(item_ids, stocked_ids)] = stocked_quantities
+    return Demand(item_ids, quantities, np.searchsorted(item_ids, ids), end.toordinal() - ordinals, sold, days)
+
+# Sales weighted below this fraction of today's are left out of the EWMA
+EWMA_CUTOFF = 1e-9
+
+def _window_sums(demand: Demand, window: int, weights: np.ndarray = None, squared: bool = False) -> np.ndarray:
+    """Per-item sums of quantity (optionally squared, or weighted by age) over the last ``window`` days"""
+    recent = slice(0, np.searchsorted(demand.age, window))
+    values = demand.quantity[recent]
+    if squared:
+        values = values ** 2
+    if weights is not None:
+        values = values * weights[demand.age[recent]]
+    return np.bincount(demand.item_index[recent], weights=values, minlength=len(demand.item_ids))
+
+def forecast(demand: Demand, alpha: float = 0.2, lead_time_days: int = 14, safety_factor: float = 1.65) -> dict:
+    """Per-item statistics as arrays aligned with ``demand.item_ids``"""
+    result = {}
+    for window in WINDOWS:
+        result[f"avg_{window}d"] = _window_sums(demand, window) / min(window, demand.days)
+
+    # s_t = alpha * x_t + (1 - alpha) * s_(t-1) from s = 0 before the first day,
+    # unrolled: today's value weighs a sale ``age`` days ago by alpha * (1 - alpha)^age
+    decay = (1 - alpha) ** np.arange(demand.days)
+    horizon = int(np.count_nonzero(decay >= EWMA_CUTOFF))
+    velocity = _window_sums(demand, horizon, weights=alpha * decay)
+    result["daily_demand"] = velocity
+
+    window = min(VOLATILITY_WINDOW, demand.days)
+    mean = _window_sums(demand, window) / window
+    mean_square = _window_sums(demand, window, squared=True) / window
+    std = np.sqrt(np.clip(mean_square - mean ** 2, 0, None))
+    result["demand_std"] = std
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["days_of_cover"] = np.where(velocity > 0, demand.stock / velocity, np.inf)
+    result["reorder_point"] = velocity * lead_time_days + safety_factor * std * np.sqrt(lead_time_days)
+    result["low_stock"] = demand.stock <= result["reorder_point"]
+    return result
+
+def ranked(demand: Demand, result: dict, low_stock_only: bool = False, limit: int = None) -> list[dict]:
+    """Rows for the items that run out first (fewest days of cover, then item id)"""
+    candidates = np.flatnonzero(result["low_stock"]) if low_stock_only else np.arange(len(demand.item_ids))
+    # item_ids are sorted, so a stable sort keeps ties in item id order
+    order = candidates[np.argsort(result["days_of_cover"][candidates], kind="stable")][:limit]
+    rows = []
+    for i in order.tolist():
+        cover = result["days_of_cover"][i]
+        row = {"item_id": int(demand.item_ids[i]), "quantity": int(demand.stock[i])}
+        for window in WINDOWS:
+            row[f"avg_{window}d"] = round(float(result[f"avg_{window}d"][i]), 3)
+        row["daily_demand"] = round(float(result["daily_demand"][i]), 3)
+        row["demand_std"] = round(float(result["demand_std"][i]), 3)
+        row["days_of_cover"] = round(float(cover), 1) if np.isfinite(cover) else None
+        row["reorder_point"] = round(float(result["reorder_point"][i]), 1)
+        row["low_stock"] = bool(result["low_stock"][i])
+        rows.append(row)
+    return rows
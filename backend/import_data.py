@@ -0,0 +1,48 @@
+"""
+Command-line bulk import of items and inventory from CSV or NDJSON files
+
+    python import_data.py items catalog.csv
+    python import_data.py inventory stock.ndjson --mode add
+
+Items need name, item_type and cost columns (description optional) and are
+upserted by name. Inventory rows need quantity plus item_id or item_name.
+"""
+import argparse
+import sys
+import time
+from database import SessionLocal, engine
+import importer
+import migrations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["items", "inventory"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--mode", choices=["set", "add"], default="set", help="inventory only: overwrite or add to stock")
+    parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+    args = parser.parse_args()
+
+    migrations.migrate(engine)
+    fmt = args.format or importer.detect_format(args.path)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            if args.kind == "items":
+                report = importer.import_items(db, stream, fmt, args.batch_size)
+            else:
+                report = importer.import_inventory(db, stream, fmt, args.mode, args.batch_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    if report.errors_truncated:
+        print(f"... {report.failed - len(report.errors)} more errors", file=sys.stderr)
+    print(f"Processed {report.processed} rows in {elapsed:.1f}s: {report.imported} imported, {report.failed} failed")
+    sys.exit(1 if report.failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Streaming bulk import of items and inventory from CSV or NDJSON
+
+Uploads are parsed row by row from the (disk-spooled) file and written in
+batches, so memory use stays flat regardless of file size:
+
+- items are upserted on their unique name with one INSERT ... ON DUPLICATE KEY
+  UPDATE (ON CONFLICT on SQLite/PostgreSQL) per batch
+- inventory rows reference an item by ``item_id`` or ``item_name``; each batch
+  resolves names and validates ids with IN queries, locks the existing stock
+  rows and writes all levels with one CASE update plus one bulk insert
+
+Each batch commits on its own. Invalid rows are reported with their line number
+and skipped; if a batch write fails it is retried row by row to pin the error
+on the offending rows.
+"""
+from typing import IO, Iterator, Literal, Optional
+import csv
+import io
+import json
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from upsert import upsert
+import change_feed
+import models
+import schemas
+import stock
+from catalog_cache import catalog_cache
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+ImportFormat = Literal["csv", "ndjson"]
+
+def detect_format(filename: Optional[str]) -> ImportFormat:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+def iter_records(stream: IO[bytes], fmt: ImportFormat) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line, record, error)`` for each row of a binary CSV/NDJSON stream"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, record, None
+        else:
+            for line_no, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, f"Invalid JSON: {e}"
+                    continue
+                if isinstance(record, dict):
+                    yield line_no, record, None
+                else:
+                    yield line_no, None, "Expected a JSON object"
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
+
+def _blank_to_none(record: dict) -> dict:
+    return {key: (None if value == "" else value) for key, value in record.items() if key is not None}
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+class ImportRun:
+    """Accumulates counts and per-row errors for one import"""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.errors = []
+        self.failed = 0
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(schemas.ImportRowError(line=line, error=error))
+
+    def report(self) -> schemas.ImportReport:
+        return schemas.ImportReport(
+            processed=self.processed,
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+def _batches(records, run: ImportRun, parse, batch_size: int):
+    batch = []
+    for line, record, error in records:
+        run.processed += 1
+        if error is None:
+            try:
+                batch.append((line, parse(_blank_to_none(record))))
+            except ValidationError as e:
+                error = _validation_message(e)
+            except (KeyError, ValueError, TypeError) as e:
+                error = str(e)
+        if error is not None:
+            run.fail(line, error)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _write(db: Session, run: ImportRun, batch: list, write):
+    """Write a batch in one transaction, falling back to row by row on failure.
+
+    ``write`` returns the ``(line, error)`` pairs of rows it rejected.
+    """
+    try:
+        rejected = write(db, batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+    else:
+        run.imported += len(batch) - len(rejected)
+        for line, error in rejected:
+            run.fail(line, error)
+        return
+    for line, row in batch:
+        try:
+            rejected = write(db, [(line, row)])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            rejected = [(line, str(getattr(e, "orig", e)))]
+        run.imported += 1 - len(rejected)
+        for line, error in rejected:
+            run.fail(line, error)
+
+def _write_items(db: Session, batch: list):
+    # Last occurrence of a name within the batch wins
+    rows = {row.name: row.dict() for _, row in batch}
+    upsert(db, models.Item.__table__, list(rows.values()), ["name"], lambda new: {
+        "item_type": new.item_type,
+        "cost": new.cost,
+        "description": new.description,
+        "updated_at": func.now(),
+    })
+    # populate_existing: rows loaded by an earlier batch hold the values from before the upsert
+    change_feed.items_changed(db, db.query(models.Item).populate_existing().filter(models.Item.name.in_(rows)).all())
+    return []
+
+def import_items(db: Session, stream: IO[bytes], fmt: ImportFormat = "csv", batch_size: int = BATCH_SIZE) -> schemas.ImportReport:
+    """Upsert items (name, item_type, cost, description) keyed on name"""
+    run = ImportRun()
+    try:
+        for batch in _batches(iter_records(stream, fmt), run, lambda record: schemas.ItemCreate(**record), batch_size):
+            _write(db, run, batch, _write_items)
+    finally:
+        # Cached items may have been overwritten by the upserts
+        catalog_cache.invalidate()
+    return run.report()
+
+def _parse_inventory(record: dict) -> dict:
+    if record.get("item_id") is None and record.get("item_name") is None:
+        raise ValueError("item_id or item_name is required")
+    if record.get("quantity") is None:
+        raise ValueError("quantity is required")
+    quantity = int(record["quantity"])
+    if quantity < 0:
+        raise ValueError("quantity must not be negative")
+    item_id = int(record["item_id"]) if record.get("item_id") is not None else None
+    return {"item_id": item_id, "item_name": record.get("item_name"), "quantity": quantity}
+
+def import_inventory(db: Session, stream: IO[bytes], fmt: ImportFormat = "csv", mode: Literal["set", "add"] = "set",
+                     batch_size: int = BATCH_SIZE) -> schemas.ImportReport:
+    """Set (or add to) stock levels for items referenced by id or name"""
+    run = ImportRun()
+
+    def write(db: Session, batch: list):
+        names = {row["item_name"] for _, row in batch if row["item_id"] is None}
+        ids = {row["item_id"] for _, row in batch if row["item_id"] is not None}
+        by_name = dict(db.query(models.Item.name, models.Item.id).filter(models.Item.name.in_(names))) if names else {}
+        known = {item_id for (item_id,) in db.query(models.Item.id).filter(models.Item.id.in_(ids))} if ids else set()
+
+        rejected = []
+        quantities = {}
+        for line, row in batch:
+            item_id = row["item_id"] if row["item_id"] is not None else by_name.get(row["item_name"])
+            if item_id is None or (row["item_id"] is not None and item_id not in known):
+                rejected.append((line, f"Item {row['item_id'] if row['item_id'] is not None else row['item_name']} not found"))
+            elif mode == "add":
+                quantities[item_id] = quantities.get(item_id, 0) + row["quantity"]
+            else:
+                quantities[item_id] = row["quantity"]
+
+        current = stock.lock_levels(db, sorted(quantities))
+        if mode == "add":
+            quantities = {item_id: current.get(item_id, 0) + quantity for item_id, quantity in quantities.items()}
+        stock.write_levels(db, quantities, current)
+        return rejected
+
+    for batch in _batches(iter_records(stream, fmt), run, _parse_inventory, batch_size):
+        _write(db, run, batch, write)
+    return run.report()
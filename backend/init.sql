@@ -1,6 +1,6 @@
--- This file is executed when MySQL container starts for the first time
--- It creates the database schema
-
-CREATE DATABASE IF NOT EXISTS medical_inventory;
-USE medical_inventory;
-
+-- This file is executed when MySQL container starts for the first time
+-- It creates the database; tables and indexes come from backend/migrations.py
+
+CREATE DATABASE IF NOT EXISTS medical_inventory;
+USE medical_inventory;
+
@@ -0,0 +1,197 @@
+"""
+Inventory movement ledger and periodic stock snapshots
+
+Every stock change made through stock.py appends one row per item to
+``inventory_movements`` in the same transaction: the signed quantity change,
+a reason and, for orders, the order id. Rows are never updated or deleted, so
+the ledger keeps the history that ``inventory`` loses when a level is
+overwritten or a row is purged at zero.
+
+``take_snapshot`` folds the movements since the previous snapshot into
+``inventory_snapshots`` (item, as_of, quantity), writing the full stock
+level of every item with stock as of that time; an item without a row in a
+snapshot had none. Stock at time T is then read from the latest snapshot at
+or before T, a single as_of, plus the movements after it, which all fall
+within one snapshot interval: index lookups and a bounded range scan, not a
+replay of the whole history, for one item or all of them.
+
+Snapshots are taken every INVENTORY_SNAPSHOT_INTERVAL seconds (0 disables the
+background thread) as of a time aligned to the interval and
+SNAPSHOT_LAG_SECONDS in the past. The lag means movements whose transactions
+are still open when the snapshot is taken are not missed. Every worker
+computes the same as_of, and the primary key lets only one of them write it.
+
+    python ledger.py snapshot     # take a snapshot now
+    python ledger.py reconcile    # record movements for stock changed outside stock.py
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import os
+import threading
+import time
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+import models
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_SNAPSHOT_INTERVAL = float(os.getenv("INVENTORY_SNAPSHOT_INTERVAL", "3600"))  # seconds
+SNAPSHOT_LAG_SECONDS = float(os.getenv("SNAPSHOT_LAG_SECONDS", "300"))
+_EPOCH = datetime(2000, 1, 1)
+
+Movement = models.InventoryMovement
+Snapshot = models.InventorySnapshot
+
+def record(db: Session, reason: str, changes: dict[int, int], order_id: Optional[int] = None):
+    """Append ``{item_id: quantity_change}`` to the ledger with one executemany"""
+    occurred_at = datetime.now()
+    _insert(db, [{"item_id": item_id, "quantity_change": change, "reason": reason, "order_id": order_id,
+                  "occurred_at": occurred_at} for item_id, change in sorted(changes.items()) if change])
+
+def record_orders(db: Session, orders: list[tuple[int, dict[int, int]]]):
+    """Append the stock taken by a batch of ``(order_id, {item_id: quantity})`` with one executemany"""
+    occurred_at = datetime.now()
+    _insert(db, [{"item_id": item_id, "quantity_change": -quantity, "reason": "order", "order_id": order_id,
+                  "occurred_at": occurred_at}
+                 for order_id, quantities in orders for item_id, quantity in sorted(quantities.items()) if quantity])
+
+def _insert(db: Session, rows: list[dict]):
+    if rows:
+        db.execute(insert(Movement), rows)
+
+def _last_snapshot(at: datetime):
+    """as_of of the latest snapshot at or before ``at``"""
+    return select(func.max(Snapshot.as_of)).where(Snapshot.as_of <= at)
+
+def _snapshot_levels(db: Session, as_of: datetime) -> dict[int, int]:
+    """Stock of every item in the snapshot taken at ``as_of``"""
+    return dict(db.execute(select(Snapshot.item_id, Snapshot.quantity).where(Snapshot.as_of == as_of)).all())
+
+def _local(value: datetime) -> datetime:
+    # Movements are stamped with naive local time, like order dates
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def _window(after: Optional[datetime], until: datetime, item_id: Optional[int] = None) -> list:
+    """Conditions for the movements after ``after`` (if any) up to and including ``until``"""
+    conditions = [Movement.occurred_at <= until]
+    if after is not None:
+        conditions.append(Movement.occurred_at > after)
+    if item_id is not None:
+        conditions.append(Movement.item_id == item_id)
+    return conditions
+
+def snapshot_time(now: Optional[datetime] = None) -> datetime:
+    """The as_of of the snapshot due at ``now``"""
+    cutoff = (now or datetime.now()) - timedelta(seconds=SNAPSHOT_LAG_SECONDS)
+    interval = INVENTORY_SNAPSHOT_INTERVAL or 3600
+    return _EPOCH + timedelta(seconds=(cutoff - _EPOCH).total_seconds() // interval * interval)
+
+def take_snapshot(db: Session, as_of: Optional[datetime] = None) -> int:
+    """Snapshot the stock of every item, if any moved since the previous snapshot; returns the rows written.
+
+    The caller commits. A concurrent snapshot for the same as_of raises IntegrityError.
+    """
+    as_of = as_of or snapshot_time()
+    last = db.execute(select(func.max(Snapshot.as_of))).scalar()
+    if last is not None and as_of <= last:
+        return 0
+    changes = dict(db.execute(select(Movement.item_id, func.sum(Movement.quantity_change)).where(
+        *_window(last, as_of)).group_by(Movement.item_id)).all())
+    if not changes:
+        return 0
+    levels = _snapshot_levels(db, last) if last is not None else {}
+    for item_id, change in changes.items():
+        levels[item_id] = levels.get(item_id, 0) + int(change)
+    rows = [{"item_id": item_id, "as_of": as_of, "quantity": quantity}
+            for item_id, quantity in sorted(levels.items()) if quantity]
+    for i in range(0, len(rows), 1000):
+        db.execute(insert(Snapshot), rows[i:i + 1000])
+    return len(rows)
+
+def stock_at(db: Session, item_id: int, at: datetime) -> dict:
+    """Stock of one item at ``at``: its row in the latest snapshot plus its movements since (two queries)"""
+    at = _local(at)
+    # The item has no row in the snapshot when it had no stock then
+    last = select(_last_snapshot(at).scalar_subquery().label("as_of")).subquery()
+    since, quantity = db.execute(select(last.c.as_of, Snapshot.quantity).select_from(last).outerjoin(
+        Snapshot, and_(Snapshot.as_of == last.c.as_of, Snapshot.item_id == item_id))).one()
+    change = db.execute(select(func.coalesce(func.sum(Movement.quantity_change), 0)).where(
+        *_window(since, at, item_id))).scalar()
+    return {"item_id": item_id, "at": at, "quantity": (quantity or 0) + int(change), "snapshot_at": since}
+
+def stock_levels_at(db: Session, at: datetime) -> dict[int, int]:
+    """Nonzero stock of every item at ``at`` (three queries)"""
+    at = _local(at)
+    last = db.execute(_last_snapshot(at)).scalar()
+    levels = _snapshot_levels(db, last) if last is not None else {}
+    for item_id, change in db.execute(select(Movement.item_id, func.sum(Movement.quantity_change)).where(
+            *_window(last, at)).group_by(Movement.item_id)):
+        levels[item_id] = levels.get(item_id, 0) + int(change)
+    return {item_id: quantity for item_id, quantity in sorted(levels.items()) if quantity}
+
+def movements(db: Session, item_id: int, start: datetime, end: datetime, limit: int) -> dict:
+    """Stock at ``start`` and ``end`` and the first ``limit`` movements in between (four queries)"""
+    start, end = _local(start), _local(end)
+    opening = stock_at(db, item_id, start)["quantity"]
+    rows = db.execute(select(Movement).where(*_window(start, end, item_id)).order_by(
+        Movement.occurred_at, Movement.id).limit(limit)).scalars().all()
+    change = db.execute(select(func.coalesce(func.sum(Movement.quantity_change), 0)).where(
+        *_window(start, end, item_id))).scalar()
+    return {"item_id": item_id, "start": start, "end": end, "opening_quantity": opening,
+            "closing_quantity": opening + int(change), "movements": rows}
+
+def reconcile(db, reason: str = "reconcile") -> int:
+    """Record a movement for every item whose stock differs from its ledger balance.
+
+    For stock written without stock.py (seeding, migration from a database
+    without a ledger, manual fixes). Works on a Session or a Connection; the
+    caller commits. Returns the number of movements recorded.
+    """
+    balances = dict(db.execute(select(Movement.item_id, func.sum(Movement.quantity_change)).group_by(Movement.item_id)).all())
+    levels = dict(db.execute(select(models.Inventory.item_id, models.Inventory.quantity)).all())
+    changes = {item_id: levels.get(item_id, 0) - int(balances.get(item_id, 0)) for item_id in set(balances) | set(levels)}
+    record(db, reason, changes)
+    return sum(1 for change in changes.values() if change)
+
+_snapshot_thread = None
+
+def _snapshot_loop():
+    while True:
+        time.sleep(min(INVENTORY_SNAPSHOT_INTERVAL, 60))
+        db = SessionLocal()
+        try:
+            written = take_snapshot(db)
+            db.commit()
+            if written:
+                logger.info("inventory snapshot: %d items", written)
+        except IntegrityError:
+            # Another worker wrote this snapshot first
+            db.rollback()
+        except Exception:
+            db.rollback()
+            logger.exception("inventory snapshot failed")
+        finally:
+            db.close()
+
+def start_snapshot_thread():
+    """Take snapshots in the background of this process, when enabled"""
+    global _snapshot_thread
+    if INVENTORY_SNAPSHOT_INTERVAL <= 0 or _snapshot_thread is not None:
+        return
+    _snapshot_thread = threading.Thread(target=_snapshot_loop, name="inventory-snapshots", daemon=True)
+    _snapshot_thread.start()
+
+if __name__ == "__main__":
+    import sys
+    db = SessionLocal()
+    try:
+        if sys.argv[1:] == ["reconcile"]:
+            print(f"Recorded {reconcile(db)} reconciling movements")
+        else:
+            print(f"Snapshot as of {snapshot_time()}: {take_snapshot(db)} items")
+        db.commit()
+    finally:
+        db.close()
@@ -1,260 +1,465 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
-from typing import List
-import models
-import schemas
-from database import get_db, engine, Base
-import seed_data
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-# Seed database on startup (only if empty)
-try:
-    from database import SessionLocal
-    db = SessionLocal()
-    item_count = db.query(models.Item).count()
-    if item_count == 0:
-        print("Database is empty, seeding initial data...")
-        seed_data.seed_database()
-        print("Database seeded successfully!")
-    db.close()
-except Exception as e:
-    print(f"Note: Could not seed database automatically: {e}")
-    print("You can run 'python seed_data.py' manually if needed")
-
-app = FastAPI(title="Medical Inventory Management System")
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://frontend:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Items endpoints
-@app.get("/api/items", response_model=List[schemas.ItemResponse])
-def get_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    items = db.query(models.Item).offset(skip).limit(limit).all()
-    return items
-
-@app.get("/api/items/{item_id}", response_model=schemas.ItemResponse)
-def get_item(item_id: int, db: Session = Depends(get_db)):
-    item = db.query(models.Item).filter(models.Item.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    return item
-
-@app.post("/api/items", response_model=schemas.ItemResponse)
-def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
-    # Check if item with same name exists
-    existing = db.query(models.Item).filter(models.Item.name == item.name).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Item with this name already exists")
-    
-    db_item = models.Item(**item.dict())
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.put("/api/items/{item_id}", response_model=schemas.ItemResponse)
-def update_item(item_id: int, item_update: schemas.ItemUpdate, db: Session = Depends(get_db)):
-    db_item = db.query(models.Item).filter(models.Item.id == item_id).first()
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    update_data = item_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_item, field, value)
-    
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/api/items/{item_id}")
-def delete_item(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(models.Item).filter(models.Item.id == item_id).first()
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    # Check if item is in inventory
-    inventory_entry = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
-    if inventory_entry:
-        raise HTTPException(status_code=400, detail="Cannot delete item that exists in inventory. Remove from inventory first.")
-    
-    db.delete(db_item)
-    db.commit()
-    return {"message": "Item deleted successfully"}
-
-# Inventory endpoints
-@app.get("/api/inventory", response_model=List[schemas.InventoryResponse])
-def get_inventory(db: Session = Depends(get_db)):
-    inventory = db.query(models.Inventory).all()
-    return inventory
-
-@app.get("/api/inventory/{item_id}", response_model=schemas.InventoryResponse)
-def get_inventory_item(item_id: int, db: Session = Depends(get_db)):
-    inventory = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
-    if not inventory:
-        raise HTTPException(status_code=404, detail="Inventory entry not found")
-    return inventory
-
-@app.post("/api/inventory", response_model=schemas.InventoryResponse)
-def add_to_inventory(inventory: schemas.InventoryCreate, db: Session = Depends(get_db)):
-    # Check if item exists
-    item = db.query(models.Item).filter(models.Item.id == inventory.item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    # Check if inventory entry exists
-    existing = db.query(models.Inventory).filter(models.Inventory.item_id == inventory.item_id).first()
-    if existing:
-        existing.quantity += inventory.quantity
-        db.commit()
-        db.refresh(existing)
-        return existing
-    
-    db_inventory = models.Inventory(**inventory.dict())
-    db.add(db_inventory)
-    db.commit()
-    db.refresh(db_inventory)
-    return db_inventory
-
-@app.put("/api/inventory/{item_id}", response_model=schemas.InventoryResponse)
-def update_inventory(item_id: int, inventory_update: schemas.InventoryUpdate, db: Session = Depends(get_db)):
-    inventory = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
-    if not inventory:
-        raise HTTPException(status_code=404, detail="Inventory entry not found")
-    
-    inventory.quantity = inventory_update.quantity
-    if inventory.quantity < 0:
-        inventory.quantity = 0
-    
-    db.commit()
-    db.refresh(inventory)
-    return inventory
-
-@app.delete("/api/inventory/{item_id}")
-def remove_from_inventory(item_id: int, quantity: int = None, db: Session = Depends(get_db)):
-    inventory = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
-    if not inventory:
-        raise HTTPException(status_code=404, detail="Inventory entry not found")
-    
-    if quantity is None:
-        # Remove entire entry
-        db.delete(inventory)
-    else:
-        # Reduce quantity
-        inventory.quantity -= quantity
-        if inventory.quantity <= 0:
-            db.delete(inventory)
-        else:
-            db.commit()
-            db.refresh(inventory)
-            return {"message": f"Removed {quantity} items from inventory"}
-    
-    db.commit()
-    return {"message": "Item removed from inventory"}
-
-# Orders endpoints
-@app.get("/api/orders", response_model=List[schemas.OrderResponse])
-def get_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = db.query(models.Order).offset(skip).limit(limit).order_by(models.Order.order_date.desc()).all()
-    return orders
-
-@app.post("/api/orders", response_model=schemas.OrderResponse)
-def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
-    total_amount = 0.0
-    order_items_list = []
-    
-    # Validate all items exist and have sufficient inventory
-    for order_item in order.items:
-        item = db.query(models.Item).filter(models.Item.id == order_item.item_id).first()
-        if not item:
-            raise HTTPException(status_code=404, detail=f"Item {order_item.item_id} not found")
-        
-        inventory = db.query(models.Inventory).filter(models.Inventory.item_id == order_item.item_id).first()
-        if not inventory or inventory.quantity < order_item.quantity:
-            raise HTTPException(status_code=400, detail=f"Insufficient inventory for item {item.name}")
-        
-        subtotal = item.cost * order_item.quantity
-        total_amount += subtotal
-        order_items_list.append({
-            "item_id": order_item.item_id,
-            "quantity": order_item.quantity,
-            "unit_price": item.cost,
-            "subtotal": subtotal
-        })
-    
-    # Create order
-    db_order = models.Order(total_amount=total_amount)
-    db.add(db_order)
-    db.flush()
-    
-    # Create order items and update inventory
-    for order_item_data in order_items_list:
-        db_order_item = models.OrderItem(
-            order_id=db_order.id,
-            **order_item_data
-        )
-        db.add(db_order_item)
-        
-        # Update inventory
-        inventory = db.query(models.Inventory).filter(models.Inventory.item_id == order_item_data["item_id"]).first()
-        inventory.quantity -= order_item_data["quantity"]
-        if inventory.quantity <= 0:
-            db.delete(inventory)
-    
-    db.commit()
-    db.refresh(db_order)
-    return db_order
-
-# Historical orders statistics
-@app.get("/api/orders/stats/weekly")
-def get_weekly_order_stats(weeks: int = 12, db: Session = Depends(get_db)):
-    end_date = datetime.now()
-    start_date = end_date - timedelta(weeks=weeks)
-    
-    # Get orders grouped by week
-    orders = db.query(models.Order).filter(
-        models.Order.order_date >= start_date
-    ).order_by(models.Order.order_date).all()
-    
-    # Group by week
-    weekly_stats = {}
-    for order in orders:
-        # Get week start (Monday)
-        week_start = order.order_date - timedelta(days=order.order_date.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weekly_stats:
-            weekly_stats[week_key] = {
-                "week_start": week_key,
-                "week_end": (week_start + timedelta(days=6)).strftime("%Y-%m-%d"),
-                "total_orders": 0,
-                "total_amount": 0.0,
-                "item_counts": {}
-            }
-        
-        weekly_stats[week_key]["total_orders"] += 1
-        weekly_stats[week_key]["total_amount"] += order.total_amount
-        
-        # Count items in this order
-        for order_item in order.order_items:
-            item_name = order_item.item.name
-            if item_name not in weekly_stats[week_key]["item_counts"]:
-                weekly_stats[week_key]["item_counts"][item_name] = 0
-            weekly_stats[week_key]["item_counts"][item_name] += order_item.quantity
-    
-    return list(weekly_stats.values())
-
-@app.get("/")
-def root():
-    return {"message": "Medical Inventory Management System API"}
-
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional, Union
+import models
+import schemas
+from database import ASYNC_MODE, async_engine, db_endpoint, get_db, get_sync_db, engine
+import bootstrap
+import rollups
+import order_service
+import stock
+import conditional
+import serializers
+import importer
+import exporter
+import metrics
+import search
+import forecast
+import analytics
+import replicas
+import ledger
+import change_feed
+from catalog_cache import catalog_cache, start_invalidation_listener
+from query_budget import QueryBudgetMiddleware, instrument, query_budget
+from pagination import NEXT_CURSOR_HEADER, apply_keyset, set_next_cursor
+from replicas import get_read_db
+from search import ItemFilters, item_filters
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation and seeding are opt-in (DB_AUTO_INIT) and run once across
+    # workers; otherwise importing and starting the app touches no database
+    if bootstrap.DB_AUTO_INIT:
+        await run_in_threadpool(bootstrap.initialize)
+    # Cross-worker catalog cache invalidation, when configured
+    start_invalidation_listener()
+    # Periodic inventory snapshots for point-in-time stock queries
+    ledger.start_snapshot_thread()
+    # This process's change feed poller, shared by its /api/changes streams;
+    # its position is read on the first poll or dashboard request, not here
+    change_feed.feed.start()
+    yield
+    await change_feed.feed.stop()
+
+app = FastAPI(title="Medical Inventory Management System", lifespan=lifespan)
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://frontend:3000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
+)
+
+# Compress large responses; brotli when brotli-asgi is installed, gzip otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=1024, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Count SQL statements per request against each endpoint's @query_budget
+instrument(engine)
+if ASYNC_MODE:
+    instrument(async_engine.sync_engine)
+for replica in replicas.REPLICAS:
+    instrument(replica.engine)
+    if ASYNC_MODE:
+        instrument(replica.async_engine.sync_engine)
+app.add_middleware(QueryBudgetMiddleware)
+
+# After a successful write, the client's reads go to the primary for a while
+if replicas.REPLICAS:
+    app.add_middleware(replicas.ReadYourWritesMiddleware)
+
+# Per-route latency, size and SQL metrics, served on /metrics; added last so
+# it wraps the other middleware and sees the response as sent
+metrics.instrument_engine(engine)
+if ASYNC_MODE:
+    metrics.instrument_engine(async_engine.sync_engine, "primary-async")
+for replica in replicas.REPLICAS:
+    metrics.instrument_engine(replica.engine, replica.name)
+    if ASYNC_MODE:
+        metrics.instrument_engine(replica.async_engine.sync_engine, f"{replica.name}-async")
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Eager-load the relationship graphs the response schemas serialize, so nested
+# responses cost a constant number of queries instead of one per row
+ORDER_LOAD_OPTIONS = (selectinload(models.Order.order_items).selectinload(models.OrderItem.item),)
+INVENTORY_LOAD_OPTIONS = (joinedload(models.Inventory.item),)
+
+def _load_inventory(db: Session, item_id: int):
+    return db.query(models.Inventory).options(*INVENTORY_LOAD_OPTIONS).filter(models.Inventory.item_id == item_id).first()
+
+# Items endpoints
+@app.get("/api/items", response_model=List[schemas.ItemResponse])
+@query_budget(2)
+@db_endpoint
+def get_items(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+              sort: Literal["id", "name"] = "id", fast: bool = False, filters: ItemFilters = Depends(item_filters),
+              db: Session = Depends(get_read_db)):
+    # 304 without loading any rows when the client's ETag is still current
+    not_modified = conditional.check(request, response, db, models.Item)
+    if not_modified:
+        return not_modified
+    
+    # Keyset pagination: pass the X-Next-Cursor header back as ?cursor= for the next page
+    columns = [models.Item.id] if sort == "id" else [models.Item.name, models.Item.id]
+    query = db.query(models.Item).filter(*search.item_conditions(db, filters))
+    query = apply_keyset(query, f"items:{sort}", columns, cursor)
+    items = query.offset(skip).limit(limit).all()
+    set_next_cursor(response, f"items:{sort}", items, limit,
+                    lambda item: [item.id] if sort == "id" else [item.name, item.id])
+    if fast:
+        return serializers.fast_response(serializers.items_payload(items), response)
+    return items
+
+# Declared before /api/items/{item_id} so "types" is not parsed as an id
+@app.get("/api/items/types", response_model=List[schemas.ItemTypeCount])
+@query_budget(2)
+@db_endpoint
+def get_item_types(request: Request, response: Response, filters: ItemFilters = Depends(item_filters),
+                   db: Session = Depends(get_read_db)):
+    # Facet counts for the current search; the item_type filter itself is ignored
+    not_modified = conditional.check(request, response, db, models.Item)
+    if not_modified:
+        return not_modified
+    return search.item_type_counts(db, filters)
+
+# On the primary: served from the catalog cache, which must not be filled
+# from a lagging replica
+@app.get("/api/items/{item_id}", response_model=schemas.ItemResponse)
+@query_budget(1)
+@db_endpoint
+def get_item(item_id: int, db: Session = Depends(get_db)):
+    item = catalog_cache.get(db, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
+
+@app.post("/api/items", response_model=schemas.ItemResponse)
+@db_endpoint
+def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
+    # Check if item with same name exists; read from the database, since a
+    # cached name may belong to an item another worker renamed or deleted
+    existing = db.query(models.Item.id).filter(models.Item.name == item.name).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Item with this name already exists")
+    
+    db_item = models.Item(**item.dict())
+    db.add(db_item)
+    db.flush()
+    db.refresh(db_item)
+    # The change event commits with the item; the response is built before
+    # the commit expires the row
+    created = schemas.ItemResponse.model_validate(db_item)
+    change_feed.items_changed(db, [created])
+    db.commit()
+    catalog_cache.invalidate(created.id)
+    return created
+
+@app.put("/api/items/{item_id}", response_model=schemas.ItemResponse)
+@db_endpoint
+def update_item(item_id: int, item_update: schemas.ItemUpdate, db: Session = Depends(get_db)):
+    db_item = db.query(models.Item).filter(models.Item.id == item_id).first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    update_data = item_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_item, field, value)
+    
+    db.flush()
+    db.refresh(db_item)
+    updated = schemas.ItemResponse.model_validate(db_item)
+    change_feed.items_changed(db, [updated])
+    db.commit()
+    catalog_cache.invalidate(item_id)
+    return updated
+
+@app.delete("/api/items/{item_id}")
+@db_endpoint
+def delete_item(item_id: int, db: Session = Depends(get_db)):
+    db_item = db.query(models.Item).filter(models.Item.id == item_id).first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    # Check if item is in inventory
+    inventory_entry = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
+    if inventory_entry:
+        raise HTTPException(status_code=400, detail="Cannot delete item that exists in inventory. Remove from inventory first.")
+    
+    db.delete(db_item)
+    change_feed.item_deleted(db, item_id)
+    db.commit()
+    catalog_cache.invalidate(item_id)
+    return {"message": "Item deleted successfully"}
+
+# Inventory endpoints
+@app.get("/api/inventory", response_model=List[schemas.InventoryResponse])
+@query_budget(2)
+@db_endpoint
+def get_inventory(request: Request, response: Response, skip: int = 0, limit: Optional[int] = None,
+                  cursor: Optional[str] = None, sort: Literal["id", "name"] = "id", fast: bool = False,
+                  normalized: bool = False, filters: ItemFilters = Depends(item_filters),
+                  min_quantity: Optional[int] = Query(None, ge=0), max_quantity: Optional[int] = Query(None, ge=0),
+                  db: Session = Depends(get_read_db)):
+    not_modified = conditional.check(request, response, db, models.Inventory, models.Item)
+    if not_modified:
+        return not_modified
+    
+    # Without a limit the whole inventory is returned, as before paging existed
+    if sort == "id" and not filters.active():
+        query = db.query(models.Inventory).options(*INVENTORY_LOAD_OPTIONS)
+    else:
+        # Sorting or filtering on item columns: join once and fill inv.item from it
+        query = db.query(models.Inventory).join(models.Inventory.item).options(contains_eager(models.Inventory.item))
+        query = query.filter(*search.item_conditions(db, filters))
+    query = query.filter(*search.quantity_conditions(min_quantity, max_quantity))
+    columns = [models.Inventory.id] if sort == "id" else [models.Item.name, models.Inventory.id]
+    query = apply_keyset(query, f"inventory:{sort}", columns, cursor)
+    if skip:
+        query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    inventory = query.all()
+    set_next_cursor(response, f"inventory:{sort}", inventory, limit,
+                    lambda inv: [inv.id] if sort == "id" else [inv.item.name, inv.id])
+    # High-throughput modes: orjson without response_model validation, optionally
+    # with each item emitted once in a side table
+    if fast or normalized:
+        return serializers.fast_response(serializers.inventory_payload(inventory, normalized), response)
+    return inventory
+
+# Declared before /api/inventory/{item_id} so "forecast" is not taken for an id
+@app.get("/api/inventory/forecast", response_model=List[schemas.InventoryForecast])
+@query_budget(3)
+@db_endpoint
+def get_inventory_forecast(history_days: int = Query(365, ge=1, le=3650), alpha: float = Query(0.2, gt=0, le=1),
+                           lead_time_days: int = Query(14, ge=0), safety_factor: float = Query(1.65, ge=0),
+                           low_stock_only: bool = False, limit: int = Query(100, ge=1),
+                           db: Session = Depends(get_read_db)):
+    # Stock and demand in two bulk queries, then vectorized over all items
+    demand = forecast.load_demand(db, history_days)
+    result = forecast.forecast(demand, alpha, lead_time_days, safety_factor)
+    rows = forecast.ranked(demand, result, low_stock_only, limit)
+    items = catalog_cache.get_many(db, [row["item_id"] for row in rows])
+    for row in rows:
+        item = items.get(row["item_id"])
+        if item is not None:
+            row["name"], row["item_type"] = item.name, item.item_type
+    # An item deleted since load_demand read the catalog has nothing to report against
+    return [row for row in rows if "name" in row]
+
+# Stock history from the movement ledger and its snapshots (see ledger.py)
+@app.get("/api/inventory/stock-at", response_model=List[schemas.StockLevel])
+@query_budget(3)
+@db_endpoint
+def get_stock_levels_at(at: datetime, db: Session = Depends(get_read_db)):
+    return [{"item_id": item_id, "quantity": quantity} for item_id, quantity in ledger.stock_levels_at(db, at).items()]
+
+@app.get("/api/inventory/{item_id}/stock-at", response_model=schemas.StockAt)
+@query_budget(2)
+@db_endpoint
+def get_stock_at(item_id: int, at: datetime, db: Session = Depends(get_read_db)):
+    return ledger.stock_at(db, item_id, at)
+
+@app.get("/api/inventory/{item_id}/movements", response_model=schemas.MovementRange)
+@query_budget(4)
+@db_endpoint
+def get_inventory_movements(item_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_read_db)):
+    # Movements after start up to and including end; the last 30 days by default
+    end = end or datetime.now()
+    start = start or end - timedelta(days=30)
+    return ledger.movements(db, item_id, start, end, limit)
+
+@app.get("/api/inventory/{item_id}", response_model=schemas.InventoryResponse)
+@query_budget(1)
+@db_endpoint
+def get_inventory_item(item_id: int, db: Session = Depends(get_read_db)):
+    inventory = _load_inventory(db, item_id)
+    if not inventory:
+        raise HTTPException(status_code=404, detail="Inventory entry not found")
+    return inventory
+
+# A first restock of an item adds the savepoint and insert to the six statements
+@app.post("/api/inventory", response_model=schemas.InventoryResponse)
+@query_budget(9)
+@db_endpoint
+def add_to_inventory(inventory: schemas.InventoryCreate, db: Session = Depends(get_db)):
+    # Check if item exists
+    item = db.query(models.Item).filter(models.Item.id == inventory.item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    # Atomic upsert: adds to the existing stock row or creates it
+    stock.run_in_transaction(db, lambda db: stock.restock(db, inventory.item_id, inventory.quantity))
+    return _load_inventory(db, inventory.item_id)
+
+@app.put("/api/inventory/{item_id}", response_model=schemas.InventoryResponse)
+@query_budget(6)
+@db_endpoint
+def update_inventory(item_id: int, inventory_update: schemas.InventoryUpdate, db: Session = Depends(get_db)):
+    if not stock.run_in_transaction(db, lambda db: stock.set_quantity(db, item_id, inventory_update.quantity)):
+        raise HTTPException(status_code=404, detail="Inventory entry not found")
+    
+    return _load_inventory(db, item_id)
+
+@app.delete("/api/inventory/{item_id}")
+@db_endpoint
+def remove_from_inventory(item_id: int, quantity: int = None, db: Session = Depends(get_db)):
+    # Removes the entire entry when no quantity is given, or once it drops to zero
+    removed = stock.run_in_transaction(db, lambda db: stock.withdraw(db, item_id, quantity))
+    if removed is None:
+        raise HTTPException(status_code=404, detail="Inventory entry not found")
+    
+    if not removed:
+        return {"message": f"Removed {quantity} items from inventory"}
+    return {"message": "Item removed from inventory"}
+
+# Orders endpoints
+@app.get("/api/orders", response_model=List[schemas.OrderResponse])
+@query_budget(4)
+@db_endpoint
+def get_orders(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+               fast: bool = False, normalized: bool = False, db: Session = Depends(get_read_db)):
+    not_modified = conditional.check(request, response, db, models.Order, models.Item)
+    if not_modified:
+        return not_modified
+    
+    # Newest first; (order_date, id) keeps the order total for the cursor
+    columns = [models.Order.order_date, models.Order.id]
+    query = apply_keyset(db.query(models.Order).options(*ORDER_LOAD_OPTIONS), "orders", columns, cursor, descending=True)
+    orders = query.offset(skip).limit(limit).all()
+    set_next_cursor(response, "orders", orders, limit, lambda order: [order.order_date, order.id])
+    if fast or normalized:
+        return serializers.fast_response(serializers.orders_payload(orders, normalized), response)
+    return orders
+
+@app.post("/api/orders", response_model=schemas.OrderResponse)
+@db_endpoint
+def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
+    # Validates, inserts and decrements stock atomically; retried on deadlock
+    order_id = stock.run_in_transaction(db, lambda db: order_service.place_order(db, order.items))
+    return db.query(models.Order).options(*ORDER_LOAD_OPTIONS).filter(models.Order.id == order_id).one()
+
+@app.post("/api/orders/bulk", response_model=schemas.BulkOrderResponse)
+@db_endpoint
+def create_orders_bulk(bulk: schemas.BulkOrderCreate, db: Session = Depends(get_db)):
+    if len(bulk.orders) > order_service.MAX_BULK_ORDERS:
+        raise HTTPException(status_code=400, detail=f"At most {order_service.MAX_BULK_ORDERS} orders per batch")
+    
+    # Per-order results; a rejected order does not abort the rest of the batch
+    results = stock.run_in_transaction(db, lambda db: order_service.place_orders(db, bulk.orders))
+    created = sum(1 for result in results if result.success)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+@app.get("/api/orders/export")
+def export_orders(request: Request, file_format: exporter.ExportFormat = Query("csv", alias="format"),
+                  start: Optional[Union[datetime, date]] = None, end: Optional[Union[datetime, date]] = None):
+    # Streams every order line from a server-side cursor; start inclusive, end exclusive
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    filename = f"orders-export.{file_format}"
+    return StreamingResponse(
+        exporter.stream_export(file_format, exporter.as_datetime(start), exporter.as_datetime(end),
+                               session_factory=lambda: replicas.open_read_session(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Historical orders statistics
+@app.get("/api/orders/stats/weekly")
+@query_budget(2)
+@db_endpoint
+def get_weekly_order_stats(weeks: int = 12, db: Session = Depends(get_read_db)):
+    end_date = datetime.now()
+    start_date = end_date - timedelta(weeks=weeks)
+    
+    # Aggregated by week and item inside the database from the daily rollups
+    return rollups.weekly_stats(db, start_date)
+
+# Reports from the in-memory order line snapshot (see analytics.py); at most
+# three queries when the snapshot is due for a refresh, none otherwise. The
+# refresh reads the primary: it only looks back a bounded number of order ids,
+# which a lagging replica could fall behind
+@app.get("/api/analytics/revenue-by-type", response_model=List[schemas.RevenueByType])
+@query_budget(3)
+@db_endpoint
+def get_revenue_by_type(start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.revenue_by_type(analytics.snapshot.current(db), start, end)
+
+@app.get("/api/analytics/top-items", response_model=List[schemas.TopItem])
+@query_budget(3)
+@db_endpoint
+def get_top_items(by: Literal["quantity", "revenue"] = "revenue", limit: int = Query(10, ge=1, le=1000),
+                  start: Optional[date] = None, end: Optional[date] = None, item_type: Optional[str] = None,
+                  db: Session = Depends(get_db)):
+    return analytics.top_items(analytics.snapshot.current(db), by, limit, start, end, item_type)
+
+@app.get("/api/analytics/sales", response_model=List[schemas.SalesPeriod])
+@query_budget(3)
+@db_endpoint
+def get_sales_timeseries(granularity: Literal["day", "month"] = "day", start: Optional[date] = None,
+                         end: Optional[date] = None, item_type: Optional[str] = None, item_id: Optional[int] = None,
+                         db: Session = Depends(get_db)):
+    return analytics.timeseries(analytics.snapshot.current(db), granularity, start, end, item_type, item_id)
+
+# Dashboard snapshot plus the change feed that keeps it current (see change_feed.py)
+@app.get("/api/dashboard", response_model=schemas.Dashboard)
+@query_budget(3)
+@db_endpoint
+def get_dashboard(response: Response, db: Session = Depends(get_db)):
+    # The feed position is taken before the reads, so every event up to it is
+    # reflected in them; read from the primary, which a replica may lag behind.
+    # Before the poller's first tick the position is read here (one statement).
+    sequence = change_feed.feed.seed(db)
+    items = db.query(models.Item).order_by(models.Item.id).all()
+    inventory = db.query(models.Inventory).order_by(models.Inventory.id).all()
+    return serializers.fast_response(serializers.dashboard_payload(sequence, items, inventory), response)
+
+@app.get("/api/changes")
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    # A reconnecting EventSource resumes after the last event it received
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(change_feed.feed.stream(since), media_type="text/event-stream",
+                             headers=change_feed.STREAM_HEADERS)
+
+# Bulk import endpoints
+# Plain def endpoints on a sync session: parsing a large upload is blocking
+# work that belongs in the threadpool in either DB_MODE
+@app.post("/api/import/items", response_model=schemas.ImportReport)
+def import_items(file: UploadFile = File(...), file_format: Optional[importer.ImportFormat] = Query(None, alias="format"),
+                 db: Session = Depends(get_sync_db)):
+    fmt = file_format or importer.detect_format(file.filename)
+    return importer.import_items(db, file.file, fmt)
+
+@app.post("/api/import/inventory", response_model=schemas.ImportReport)
+def import_inventory(file: UploadFile = File(...), file_format: Optional[importer.ImportFormat] = Query(None, alias="format"),
+                     mode: Literal["set", "add"] = "set", db: Session = Depends(get_sync_db)):
+    fmt = file_format or importer.detect_format(file.filename)
+    return importer.import_inventory(db, file.file, fmt, mode)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return {"catalog": catalog_cache.stats(), "analytics": analytics.snapshot.stats(), "replicas": replicas.status(),
+            "change_feed": change_feed.feed.stats()}
+
+@app.get("/")
+def root():
+    return {"message": "Medical Inventory Management System API"}
+
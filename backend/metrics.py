@@ -0,0 +1,284 @@
+"""
+Request, SQL and connection pool metrics in Prometheus text format
+
+``MetricsMiddleware`` records per-route latency, response size, in-flight
+requests and, through SQLAlchemy cursor events, the number of statements and
+time spent in the database for each request. ``InstrumentedQueuePool`` times
+how long checkouts wait for a pooled connection. ``render()`` produces the
+``/metrics`` payload; pool size, checked-out and overflow gauges are read from
+the pools at scrape time.
+
+Metrics are kept per process: with several uvicorn workers each scrape sees the
+worker that answered it, so scrape workers individually or run one per pod.
+
+Set SLOW_QUERY_MS to log statements slower than that many milliseconds, with a
+fingerprint (literals and IN lists collapsed) that groups repeats of the same
+query.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 disables the slow query log
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self, kind: str = "counter") -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> list[str]:
+        return super().render("gauge")
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total:g}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Time from request start to the last response byte",
+                            ("method", "route"))
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size as sent", ("method", "route"), SIZE_BUCKETS)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+REQUEST_QUERIES = Histogram("db_queries_per_request", "SQL statements executed per request", ("method", "route"),
+                            QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram("db_time_per_request_seconds", "Time spent executing SQL per request", ("method", "route"))
+QUERIES = Counter("db_queries_total", "SQL statements executed", ("engine",))
+QUERY_TIME = Counter("db_query_seconds_total", "Time spent executing SQL statements", ("engine",))
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS", ("engine", "fingerprint"))
+POOL_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("engine",))
+POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection", ("engine",))
+
+METRICS = (REQUESTS, REQUEST_LATENCY, RESPONSE_SIZE, IN_FLIGHT, REQUEST_QUERIES, REQUEST_DB_TIME,
+           QUERIES, QUERY_TIME, SLOW_QUERIES, POOL_WAIT, POOL_TIMEOUTS)
+
+class RequestStats:
+    """SQL activity of the request being handled"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),
+    (re.compile(r"\s+"), " "),
+]
+
+def fingerprint(statement: str) -> str:
+    """The statement with literals and bind parameters replaced, so repeats group together"""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+_route_paths = {}
+
+def _route_of(scope: dict) -> str:
+    """The path template of the matched route, so /api/items/1 and /api/items/2 share series"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        router = scope.get("router")
+        path = next((route.path for route in (router.routes if router else ())
+                     if getattr(route, "endpoint", None) is endpoint), endpoint.__name__)
+        _route_paths[endpoint] = path
+    return path
+
+def instrument_engine(engine, name: str = "primary"):
+    """Count and time statements on ``engine``; its pool is reported if it is instrumented"""
+    if engine in _engines:
+        return
+    _engines[engine] = name
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if isinstance(engine.pool, _InstrumentedPoolMixin):
+        engine.pool.metrics_name = name
+        _pools[name] = engine.pool
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    name = _engines.get(conn.engine, "unknown")
+    QUERIES.inc(name)
+    QUERY_TIME.inc(name, amount=elapsed)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        text = fingerprint(statement)
+        digest = hashlib.sha1(text.encode()).hexdigest()[:12]
+        SLOW_QUERIES.inc(name, digest)
+        where = f"{stats.scope['method']} {_route_of(stats.scope)}" if stats is not None else "background"
+        logger.warning("slow query %.1f ms [%s] %s: %s", elapsed * 1000, digest, where, text[:2000])
+
+class _InstrumentedPoolMixin:
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(self.metrics_name)
+            raise
+        POOL_WAIT.observe(time.perf_counter() - started, self.metrics_name)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+
+_engines = {}
+_pools: dict[str, QueuePool] = {}
+
+def pool_options(url: str) -> dict:
+    """``create_engine`` keyword arguments swapping the dialect's default queue pool for the instrumented one"""
+    url = make_url(url)
+    default = url.get_dialect().get_pool_class(url)
+    if default is QueuePool:
+        return {"poolclass": InstrumentedQueuePool}
+    if default is AsyncAdaptedQueuePool:
+        return {"poolclass": InstrumentedAsyncQueuePool}
+    # NullPool / StaticPool (e.g. aiosqlite) never wait for a connection
+    return {}
+
+def _pool_lines() -> list[str]:
+    gauges = [
+        ("db_pool_size", "Configured pool size", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connections currently checked out", lambda pool: pool.checkedout()),
+        ("db_pool_overflow", "Connections open beyond pool_size (negative while the pool is filling)",
+         lambda pool: pool.overflow()),
+    ]
+    lines = []
+    for metric, documentation, read in gauges:
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} gauge"]
+        for name, pool in sorted(_pools.items()):
+            lines.append(f'{metric}{{engine="{_escape(name)}"}} {read(pool)}')
+    return lines
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += _pool_lines()
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size and SQL activity per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def measured_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = _current_request.set(stats)
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            IN_FLIGHT.dec()
+            _current_request.reset(token)
+            method, route = scope["method"], _route_of(scope)
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method, route)
+            RESPONSE_SIZE.observe(size, method, route)
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_TIME.observe(stats.db_time, method, route)
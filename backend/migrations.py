@@ -0,0 +1,186 @@
+"""
+Versioned schema migrations
+
+Each migration is a function registered with ``@migration(version, description)``
+and runs in its own transaction; applied versions are recorded in the
+``schema_migrations`` table. ``migrate()`` replaces ``create_all``: a new
+database gets the full schema from version 1 (straight from the models), and
+an existing one only gets the versions it has not seen. Since version 1 builds
+the current models, later migrations check what already exists before
+changing anything. That also makes a migration safe to rerun after a failure
+on MySQL, where DDL commits implicitly and a migration cannot roll back.
+
+    python migrations.py            # upgrade to the latest version
+    python migrations.py status
+"""
+from sqlalchemy import func, inspect, select
+from sqlalchemy.engine import Connection
+import ledger
+import models
+import search
+
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    def decorator(upgrade):
+        MIGRATIONS.append((version, description, upgrade))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return upgrade
+    return decorator
+
+def _has_index(conn: Connection, table: str, columns: list[str], unique: bool = False) -> bool:
+    """Whether an index (or, with ``unique``, a unique constraint) starts with ``columns``"""
+    inspector = inspect(conn)
+    for index in inspector.get_indexes(table):
+        if index["column_names"][:len(columns)] == columns and (index["unique"] or not unique):
+            return True
+    if unique:
+        return any(c["column_names"] == columns for c in inspector.get_unique_constraints(table))
+    return False
+
+def _create_index(conn: Connection, name: str, table: str, columns: list[str], unique: bool = False):
+    if not _has_index(conn, table, columns, unique):
+        conn.exec_driver_sql(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})")
+
+@migration(1, "create tables")
+def _create_tables(conn: Connection):
+    models.Base.metadata.create_all(bind=conn)
+
+@migration(2, "index order lines, order dates and inventory items; one inventory row per item")
+def _add_indexes(conn: Connection):
+    inventory = models.Inventory.__table__
+    # Fold duplicate stock rows into the oldest one before making item_id unique
+    duplicates = conn.execute(
+        select(inventory.c.item_id, func.min(inventory.c.id), func.sum(inventory.c.quantity))
+        .group_by(inventory.c.item_id).having(func.count() > 1)
+    ).all()
+    for item_id, keep_id, quantity in duplicates:
+        conn.execute(inventory.update().where(inventory.c.id == keep_id).values(quantity=quantity))
+        conn.execute(inventory.delete().where(inventory.c.item_id == item_id, inventory.c.id != keep_id))
+    _create_index(conn, "uq_inventory_item_id", "inventory", ["item_id"], unique=True)
+
+    _create_index(conn, "ix_order_items_order_id", "order_items", ["order_id"])
+    _create_index(conn, "ix_order_items_item_id", "order_items", ["item_id"])
+    _create_index(conn, "ix_orders_order_date_id", "orders", ["order_date", "id"])
+    _create_index(conn, "ix_orders_created_at", "orders", ["created_at"])
+
+@migration(3, "filter indexes and full-text search on item name and description")
+def _add_search_indexes(conn: Connection):
+    _create_index(conn, "ix_items_item_type_cost", "items", ["item_type", "cost"])
+    _create_index(conn, "ix_items_cost", "items", ["cost"])
+    _create_index(conn, "ix_inventory_quantity", "inventory", ["quantity"])
+    # Listings compute their ETag from max(created_at) / max(updated_at)
+    for table in ("items", "inventory"):
+        _create_index(conn, f"ix_{table}_created_at", table, ["created_at"])
+        _create_index(conn, f"ix_{table}_updated_at", table, ["updated_at"])
+
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        if not any(index["name"] == search.FULLTEXT_INDEX for index in inspect(conn).get_indexes("items")):
+            conn.exec_driver_sql(f"CREATE FULLTEXT INDEX {search.FULLTEXT_INDEX} ON items (name, description)")
+    elif dialect == "sqlite":
+        # External-content FTS5 index kept in sync with items by triggers
+        fts = search.FTS_TABLE
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, content='items', content_rowid='id')")
+        conn.exec_driver_sql(f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON items BEGIN
+            INSERT INTO {fts} (rowid, name, description) VALUES (new.id, new.name, new.description); END""")
+        conn.exec_driver_sql(f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON items BEGIN
+            INSERT INTO {fts} ({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END""")
+        conn.exec_driver_sql(f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON items BEGIN
+            INSERT INTO {fts} ({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO {fts} (rowid, name, description) VALUES (new.id, new.name, new.description); END""")
+        conn.exec_driver_sql(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+@migration(4, "inventory movement ledger and snapshots, with opening balances")
+def _add_ledger(conn: Connection):
+    models.InventoryMovement.__table__.create(bind=conn, checkfirst=True)
+    models.InventorySnapshot.__table__.create(bind=conn, checkfirst=True)
+    # Existing stock enters the ledger as opening movements
+    ledger.reconcile(conn, "opening")
+
+@migration(5, "change events for the real-time feed")
+def _add_change_events(conn: Connection):
+    models.ChangeEvent.__table__.create(bind=conn, checkfirst=True)
+
+@migration(6, "shard the daily order rollup")
+def _shard_order_rollup(conn: Connection):
+    rollup = models.DailyOrderRollup.__table__
+    inspector = inspect(conn)
+    if inspector.has_table(rollup.name) and "shard" in {c["name"] for c in inspector.get_columns(rollup.name)}:
+        return
+    # One row per day, so the existing totals fit in memory; they become shard 0.
+    # If this fails after the drop, the rerun finds no table and startup's
+    # rollups.ensure_built recomputes the empty rollup from orders.
+    rows = []
+    if inspector.has_table(rollup.name):
+        rows = [dict(row._mapping) for row in conn.execute(
+            select(rollup.c.day, rollup.c.week_start, rollup.c.order_count, rollup.c.total_amount))]
+        conn.exec_driver_sql(f"DROP TABLE {rollup.name}")
+    rollup.create(bind=conn)
+    if rows:
+        conn.execute(rollup.insert(), [{**row, "shard": 0} for row in rows])
+
+@migration(7, "full inventory snapshots")
+def _fill_snapshots(conn: Connection):
+    # Snapshots used to hold only the items that moved since the previous one;
+    # carry every other item's level forward so each snapshot is complete
+    snapshot = models.InventorySnapshot.__table__
+    levels = {}
+    missing = []
+    as_of, present = None, set()
+
+    def carry_forward():
+        missing.extend({"item_id": item_id, "as_of": as_of, "quantity": quantity}
+                       for item_id, quantity in levels.items() if quantity and item_id not in present)
+
+    for row in conn.execute(select(snapshot.c.as_of, snapshot.c.item_id, snapshot.c.quantity).order_by(
+            snapshot.c.as_of, snapshot.c.item_id)):
+        if row.as_of != as_of:
+            carry_forward()
+            as_of, present = row.as_of, set()
+        present.add(row.item_id)
+        levels[row.item_id] = row.quantity
+    carry_forward()
+    for i in range(0, len(missing), 1000):
+        conn.execute(snapshot.insert(), missing[i:i + 1000])
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(models.SchemaMigration.__tablename__):
+        return 0
+    return conn.execute(select(func.coalesce(func.max(models.SchemaMigration.version), 0))).scalar()
+
+def pending(engine) -> list:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+def migrate(engine) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied.
+
+    Run it from one process at a time; bootstrap and the CLI below hold
+    ``bootstrap_lock`` while migrating.
+    """
+    applied = []
+    for version, description, upgrade in pending(engine):
+        with engine.begin() as conn:
+            models.SchemaMigration.__table__.create(bind=conn, checkfirst=True)
+            upgrade(conn)
+            conn.execute(models.SchemaMigration.__table__.insert().values(version=version, description=description))
+        applied.append(version)
+    return applied
+
+if __name__ == "__main__":
+    import sys
+    from database import engine
+    from bootstrap import bootstrap_lock
+
+    if sys.argv[1:] == ["status"]:
+        with engine.connect() as conn:
+            print(f"Current schema version: {current_version(conn)}")
+        for version, description, _ in pending(engine):
+            print(f"pending {version}: {description}")
+    else:
+        with bootstrap_lock():
+            applied = migrate(engine)
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
@@ -1,53 +1,130 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from database import Base
-
-class Item(Base):
-    __tablename__ = "items"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), unique=True, nullable=False, index=True)
-    item_type = Column(String(100), nullable=False)  # MRI Machine, X-Ray Machine, etc.
-    cost = Column(Float, nullable=False)
-    description = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    
-    inventory_entries = relationship("Inventory", back_populates="item")
-    order_items = relationship("OrderItem", back_populates="item")
-
-class Inventory(Base):
-    __tablename__ = "inventory"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
-    quantity = Column(Integer, nullable=False, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    
-    item = relationship("Item", back_populates="inventory_entries")
-
-class Order(Base):
-    __tablename__ = "orders"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    order_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    total_amount = Column(Float, nullable=False, default=0.0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    order_items = relationship("OrderItem", back_populates="order")
-
-class OrderItem(Base):
-    __tablename__ = "order_items"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
-    quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
-    subtotal = Column(Float, nullable=False)
-    
-    order = relationship("Order", back_populates="order_items")
-    item = relationship("Item", back_populates="order_items")
-
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+
+class Item(Base):
+    __tablename__ = "items"
+    __table_args__ = (
+        # Type filter and facet counts, optionally with a cost range
+        Index("ix_items_item_type_cost", "item_type", "cost"),
+        # Word search (?q=); SQLite gets an FTS5 table in migrations.py instead
+        Index("ft_items_name_description", "name", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, nullable=False, index=True)
+    item_type = Column(String(100), nullable=False)  # MRI Machine, X-Ray Machine, etc.
+    cost = Column(Float, nullable=False, index=True)
+    description = Column(Text, nullable=True)
+    # Indexed so the ETag aggregates (max created/updated) are lookups, not scans
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+    
+    inventory_entries = relationship("Inventory", back_populates="item")
+    order_items = relationship("OrderItem", back_populates="item")
+
+class Inventory(Base):
+    __tablename__ = "inventory"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, unique=True)  # one stock row per item
+    quantity = Column(Integer, nullable=False, default=0, index=True)  # low-stock filter
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+    
+    item = relationship("Item", back_populates="inventory_entries")
+
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # Newest-first listing and its keyset cursor, and date-range filters
+        Index("ix_orders_order_date_id", "order_date", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    order_items = relationship("OrderItem", back_populates="order")
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    subtotal = Column(Float, nullable=False)
+    
+    order = relationship("Order", back_populates="order_items")
+    item = relationship("Item", back_populates="order_items")
+
+
+class DailyOrderRollup(Base):
+    """Per-day order totals, maintained by create_order in the same transaction.
+
+    Each day is spread over ``rollups.ORDER_ROLLUP_SHARDS`` rows so concurrent
+    orders don't all update the same one; readers sum the shards.
+    """
+    __tablename__ = "order_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False, default=0)
+    week_start = Column(Date, nullable=False, index=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+class DailyItemRollup(Base):
+    """Per-day, per-item quantities sold, maintained alongside DailyOrderRollup"""
+    __tablename__ = "order_item_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    week_start = Column(Date, nullable=False, index=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0.0)
+
+class InventoryMovement(Base):
+    """Append-only ledger of stock changes, written by stock.py (see ledger.py)"""
+    __tablename__ = "inventory_movements"
+    # No foreign keys: the history outlives deleted items
+    __table_args__ = (Index("ix_inventory_movements_item_id_occurred_at", "item_id", "occurred_at"),)
+    
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+    reason = Column(String(20), nullable=False)  # order, restock, adjustment, withdrawal, import, opening, reconcile
+    order_id = Column(Integer, nullable=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class InventorySnapshot(Base):
+    """Stock of an item as of a snapshot time; each snapshot has a row for every item with stock"""
+    __tablename__ = "inventory_snapshots"
+    
+    item_id = Column(Integer, primary_key=True)
+    as_of = Column(DateTime(timezone=True), primary_key=True, index=True)
+    quantity = Column(Integer, nullable=False)
+
+class ChangeEvent(Base):
+    """Item, inventory and order changes in commit order, for the change feed (see change_feed.py)"""
+    __tablename__ = "change_events"
+    # AUTOINCREMENT on SQLite: sequence numbers are never reused after pruning
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)  # the feed's sequence number
+    kind = Column(String(20), nullable=False)  # item, inventory, order
+    action = Column(String(10), nullable=False)  # upsert, delete
+    key = Column(Integer, nullable=False)  # item id for item and inventory events, order id for orders
+    data = Column(Text, nullable=True)  # JSON of the new state, null for deletes
+    occurred_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class SchemaMigration(Base):
+    """Applied schema versions, see migrations.py"""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(255), nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
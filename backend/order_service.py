@@ -0,0 +1,189 @@
+"""
+Order placement shared by the order endpoints and the stress test
+
+Bulk orders insert their headers with multi-row INSERTs of up to
+INSERT_CHUNK_SIZE rows and need the generated ids back for the lines, which
+rules out one INSERT per header. Within one statement the ids are
+consecutive on SQLite (a single writer) and on MySQL when
+innodb_autoinc_lock_mode is 0 or 1 and auto_increment_increment is 1, so they
+follow from the cursor's lastrowid: the last row's id on SQLite, the first's
+(LAST_INSERT_ID()) on MySQL. Run MySQL with ``--innodb-autoinc-lock-mode=1``;
+under the interleaved mode 2 (the MySQL 8 default) a statement's ids may not
+be consecutive and the headers fall back to one INSERT each. Other dialects
+use INSERT .. RETURNING.
+"""
+from datetime import datetime
+import logging
+from fastapi import HTTPException
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+import change_feed
+import models
+import rollups
+import schemas
+import stock
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_ORDERS = 10000
+IN_CHUNK_SIZE = 1000  # keeps IN (...) lists within driver/parameter limits
+INSERT_CHUNK_SIZE = 1000  # rows per multi-row INSERT of order headers
+
+# Engine URL -> whether a multi-row INSERT gets consecutive ids (MySQL)
+_consecutive_ids: dict[str, bool] = {}
+
+def _chunks(values: list, size: int = IN_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def priced_items(db: Session, item_ids) -> dict:
+    """Name and cost of ``item_ids``, read in the order's transaction.
+
+    Not from the catalog cache: another worker's cache may still hold a cost
+    changed by ``update_item`` until its TTL expires, and lines must be
+    charged the current price.
+    """
+    item_ids = sorted(set(item_ids))
+    items = {}
+    for chunk in _chunks(item_ids):
+        items.update((row.id, row) for row in db.execute(
+            select(models.Item.id, models.Item.name, models.Item.cost).where(models.Item.id.in_(chunk))))
+    return items
+
+def _mysql_consecutive_ids(db: Session) -> bool:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _consecutive_ids:
+        lock_mode, increment = db.execute(text("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")).one()
+        _consecutive_ids[key] = int(lock_mode) in (0, 1) and int(increment) == 1
+        if not _consecutive_ids[key]:
+            logger.warning("innodb_autoinc_lock_mode=%s, auto_increment_increment=%s: bulk order headers are "
+                           "inserted one by one; set innodb_autoinc_lock_mode=1 to batch them", lock_mode, increment)
+    return _consecutive_ids[key]
+
+def insert_orders(db: Session, rows: list[dict]) -> list[int]:
+    """Insert order headers with multi-row INSERTs; returns their ids in ``rows`` order"""
+    dialect = db.get_bind().dialect
+    ids = []
+    if dialect.name == "sqlite" or (dialect.name == "mysql" and _mysql_consecutive_ids(db)):
+        for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+            last_id = db.execute(insert(models.Order).values(chunk)).lastrowid
+            # LAST_INSERT_ID() is the first row's id on MySQL, SQLite reports the last row's
+            first = last_id if dialect.name == "mysql" else last_id - len(chunk) + 1
+            ids.extend(range(first, first + len(chunk)))
+    elif dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(models.Order).returning(models.Order.id, sort_by_parameter_order=True)
+        ids = list(db.execute(stmt, rows).scalars())
+    else:
+        for row in rows:
+            ids.append(db.execute(insert(models.Order).values(row)).inserted_primary_key[0])
+    return ids
+
+def place_order(db: Session, lines: list[schemas.OrderItemCreate]) -> int:
+    """Validate, insert and take stock for one order; returns the new order id.
+
+    Must run inside ``stock.run_in_transaction`` so it is committed, or rolled
+    back and retried on deadlock, as a unit.
+    """
+    items = priced_items(db, (line.item_id for line in lines))
+
+    total_amount = 0.0
+    order_items_list = []
+    quantities = {}
+    for line in lines:
+        item = items.get(line.item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"Item {line.item_id} not found")
+
+        subtotal = item.cost * line.quantity
+        total_amount += subtotal
+        quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+        order_items_list.append({
+            "item_id": line.item_id,
+            "quantity": line.quantity,
+            "unit_price": item.cost,
+            "subtotal": subtotal
+        })
+
+    # Create order and its lines
+    db_order = models.Order(order_date=datetime.now(), total_amount=total_amount)
+    db.add(db_order)
+    db.flush()
+    if order_items_list:
+        db.execute(insert(models.OrderItem), [{"order_id": db_order.id, **data} for data in order_items_list])
+
+    # Take stock last so the row locks on hot items are held as briefly as possible
+    try:
+        stock.reserve(db, quantities, db_order.id)
+    except stock.InsufficientStock as e:
+        raise HTTPException(status_code=400, detail=f"Insufficient inventory for item {items[e.item_id].name}")
+
+    # Keep the weekly stats rollups in step with the order
+    rollups.record_order(db, db_order.order_date, total_amount, order_items_list)
+    change_feed.orders_created(db, [db_order])
+    return db_order.id
+
+def place_orders(db: Session, orders: list[schemas.OrderCreate]) -> list[schemas.BulkOrderResult]:
+    """Validate and insert a batch of orders with set-based statements.
+
+    Every referenced item (with its current cost) and its stock are read with
+    a few ``IN (...)`` queries (stock rows locked in item_id order), orders are
+    validated in memory against the running stock levels in request order, and the
+    accepted ones are written with bulk inserts, one CASE update for stock, one
+    ledger insert, one rollup upsert and the change feed events. A failing
+    order is reported in its result and does not affect the others. Must run
+    inside ``stock.run_in_transaction``.
+    """
+    item_ids = sorted({line.item_id for order in orders for line in order.items})
+    items = priced_items(db, item_ids)
+    levels = {}
+    for chunk in _chunks(sorted(items)):
+        levels.update(stock.lock_levels(db, chunk))
+
+    results = []
+    accepted = []
+    for index, order in enumerate(orders):
+        quantities = {}
+        for line in order.items:
+            quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+
+        missing = next((item_id for item_id in quantities if item_id not in items), None)
+        short = next((item_id for item_id, quantity in quantities.items() if levels.get(item_id, 0) < quantity), None)
+        if missing is not None:
+            results.append(schemas.BulkOrderResult(index=index, success=False, error=f"Item {missing} not found"))
+            continue
+        if short is not None:
+            results.append(schemas.BulkOrderResult(index=index, success=False, error=f"Insufficient inventory for item {items[short].name}"))
+            continue
+
+        for item_id, quantity in quantities.items():
+            levels[item_id] -= quantity
+        lines = [{
+            "item_id": line.item_id,
+            "quantity": line.quantity,
+            "unit_price": items[line.item_id].cost,
+            "subtotal": items[line.item_id].cost * line.quantity
+        } for line in order.items]
+        db_order = models.Order(order_date=datetime.now(), total_amount=sum(line["subtotal"] for line in lines))
+        accepted.append((index, db_order, lines, quantities))
+        results.append(schemas.BulkOrderResult(index=index, success=True, total_amount=db_order.total_amount))
+
+    if not accepted:
+        return results
+
+    # Order headers need their generated ids for the lines
+    order_ids = insert_orders(db, [{"order_date": db_order.order_date, "total_amount": db_order.total_amount}
+                                   for _, db_order, _, _ in accepted])
+    for (_, db_order, _, _), order_id in zip(accepted, order_ids):
+        db_order.id = order_id
+    order_item_rows = [{"order_id": db_order.id, **line} for _, db_order, lines, _ in accepted for line in lines]
+    if order_item_rows:
+        db.execute(insert(models.OrderItem), order_item_rows)
+
+    stock.apply_reservations(db, [(db_order.id, quantities) for _, db_order, _, quantities in accepted])
+    rollups.record_orders(db, [(db_order.order_date, db_order.total_amount, lines) for _, db_order, lines, _ in accepted])
+    change_feed.orders_created(db, [db_order for _, db_order, _, _ in accepted])
+
+    for index, db_order, _, _ in accepted:
+        results[index].order_id = db_order.id
+    return results
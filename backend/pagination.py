@@ -0,0 +1,59 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort key name and the sort
+column values of the last row on a page. The next page filters on
+``(columns) > (values)`` instead of skipping rows with OFFSET, so deep pages
+cost the same index range scan as the first one.
+"""
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(key: str, values: list) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    payload = json.dumps({"k": key, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, key: str, columns) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if payload["k"] != key or len(values) != len(columns):
+            raise ValueError("cursor does not match this listing")
+        return [
+            datetime.fromisoformat(v) if isinstance(column.type, DateTime) else v
+            for column, v in zip(columns, values)
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after(columns, values, descending: bool):
+    # (a, b) > (x, y) expanded to a > x OR (a = x AND b > y), which every
+    # dialect can turn into an index range scan
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+def apply_keyset(query, key: str, columns: list, cursor: Optional[str], descending: bool = False):
+    """Order ``query`` by ``columns`` and start after the position in ``cursor``.
+
+    The last column must be unique so that the ordering is total.
+    """
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, key, columns), descending))
+    return query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+def set_next_cursor(response: Response, key: str, rows: list, limit: Optional[int], values_of):
+    """Advertise the cursor for the page after ``rows`` when the page is full"""
+    if rows and limit is not None and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key, values_of(rows[-1]))
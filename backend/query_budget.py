@@ -0,0 +1,106 @@
+"""
+Per-request SQL query budgets to catch N+1 regressions
+
+Endpoints declare how many statements they may run with ``@query_budget(n)``.
+``QueryBudgetMiddleware`` counts the statements executed while a request is
+handled (including lazy loads triggered by response serialization) through
+SQLAlchemy engine events, and enforces the declared budget when
+``QUERY_BUDGET_MODE`` is ``warn`` or ``raise``. Tests run with ``raise`` so an
+endpoint that goes over budget fails instead of silently shipping.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import os
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()  # off, warn or raise
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __repr__(self):
+        return f"<QueryCounter count={self.count}>"
+
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+def instrument(engine):
+    """Count statements executed on ``engine`` against the active counter"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+@contextmanager
+def count_queries():
+    """Count the statements executed inside the block on instrumented engines"""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+@contextmanager
+def assert_max_queries(budget: int):
+    """Fail when the block executes more than ``budget`` statements"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(_describe(counter, budget, "block"))
+
+def query_budget(budget: int):
+    """Declare the maximum number of statements an endpoint may execute"""
+    def decorator(func):
+        func.query_budget = budget
+        return func
+    return decorator
+
+def _describe(counter: QueryCounter, budget: int, where: str) -> str:
+    statements = "\n".join(f"  {s.splitlines()[0][:120]}" for s in counter.statements)
+    return f"{where} executed {counter.count} queries (budget {budget}):\n{statements}"
+
+class QueryBudgetMiddleware:
+    """ASGI middleware enforcing the ``@query_budget`` declared on each endpoint.
+
+    The check runs when the response starts, after the endpoint returned and its
+    response model was serialized, so lazy loads during serialization count.
+    """
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        async def checked_send(message):
+            if message["type"] == "http.response.start":
+                self._check(scope, counter)
+            await send(message)
+
+        with count_queries() as counter:
+            await self.app(scope, receive, checked_send)
+
+    def _check(self, scope, counter: QueryCounter):
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is None or counter.count <= budget:
+            return
+        message = _describe(counter, budget, f"{scope['method']} {scope['path']}")
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,153 @@
+"""
+Read replicas for the read-only endpoints
+
+Set DATABASE_REPLICA_URLS to a comma-separated list of replica URLs. Read
+endpoints depend on ``get_read_db``, which opens its session on the next
+replica in round-robin order. Writes keep using ``get_db`` and the primary.
+
+- Health: the session checks out (and pre-pings) its connection up front. A
+  replica that cannot be reached is skipped for REPLICA_RETRY_SECONDS, then
+  tried again. With no replica available, reads go to the primary.
+- Read-your-writes: ``ReadYourWritesMiddleware`` sets a cookie on the response
+  to every successful write. For READ_YOUR_WRITES_SECONDS (set it above the
+  usual replication lag) that client's reads go to the primary, so it never
+  sees a replica that has not caught up with its own change. The cookie works
+  across uvicorn workers; the frontend sends it with ``withCredentials``.
+
+Replicas are migrated through replication, not by bootstrap. To try it locally
+with SQLite, copy the database file: the copy stands in for a replica that has
+stopped replicating, which makes the routing easy to see.
+
+    cp inventory.db replica.db
+    DATABASE_URL=sqlite:///./inventory.db DATABASE_REPLICA_URLS=sqlite:///./replica.db uvicorn main:app
+
+With MySQL, run a second server as a replica of the first (``CHANGE REPLICATION
+SOURCE TO ...; START REPLICA``) and list its URL in DATABASE_REPLICA_URLS.
+"""
+from itertools import count
+import logging
+import os
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import Session, sessionmaker
+from database import ASYNC_MODE, AsyncSessionLocal, SessionLocal, engine_options, to_async_url
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_COOKIE = "db_primary_until"
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        # Sessions carry the replica name in Session.info (see catalog_cache)
+        self.engine = create_engine(url, **engine_options(url))
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine,
+                                            info={"replica": name})
+        self.async_engine = None
+        self.async_session_factory = None
+        if ASYNC_MODE:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            async_url = to_async_url(url)
+            self.async_engine = create_async_engine(async_url, **engine_options(async_url))
+            self.async_session_factory = async_sessionmaker(self.async_engine, autoflush=False,
+                                                            expire_on_commit=False, info={"replica": name})
+        self.down_until = 0.0
+        self.failures = 0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: Exception):
+        self.failures += 1
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning("replica %s unavailable for %.0fs: %s", self.name, REPLICA_RETRY_SECONDS, error)
+
+REPLICAS = [Replica(f"replica-{n}", url) for n, url in enumerate(REPLICA_URLS)]
+
+_turns = count()
+
+def _candidates() -> list[Replica]:
+    """Available replicas, starting from the next one in round-robin order"""
+    start = next(_turns) % len(REPLICAS)
+    return [replica for replica in REPLICAS[start:] + REPLICAS[:start] if replica.available()]
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether this client wrote recently and must read its own writes"""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def open_read_session(request: Request) -> Session:
+    """A sync session on a healthy replica, or on the primary"""
+    if REPLICAS and not reads_from_primary(request):
+        for replica in _candidates():
+            db = replica.session_factory()
+            try:
+                db.connection()
+                return db
+            except exc.DBAPIError as e:
+                db.close()
+                replica.mark_down(e)
+    return SessionLocal()
+
+def get_sync_read_db(request: Request):
+    db = open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    if REPLICAS and not reads_from_primary(request):
+        for replica in _candidates():
+            db = replica.async_session_factory()
+            try:
+                await db.connection()
+            except exc.DBAPIError as e:
+                await db.close()
+                replica.mark_down(e)
+                continue
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Request dependency for read-only endpoints in the configured DB_MODE
+get_read_db = get_async_read_db if ASYNC_MODE else get_sync_read_db
+
+def status() -> list[dict]:
+    now = time.monotonic()
+    return [
+        {"name": replica.name, "available": replica.available(), "failures": replica.failures,
+         "retry_in_seconds": None if replica.available() else round(replica.down_until - now, 1)}
+        for replica in REPLICAS
+    ]
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client's reads to the primary after it writes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def pinning_send(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + READ_YOUR_WRITES_SECONDS
+                cookie = (f"{PRIMARY_COOKIE}={until:.3f}; Max-Age={int(READ_YOUR_WRITES_SECONDS) + 1}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, pinning_send)
@@ -0,0 +1,168 @@
+"""
+Daily order rollups backing the weekly statistics endpoint
+
+Orders are immutable once created, so every order adds its totals to a per-day
+row (and a per-day, per-item row) in the same transaction that inserts it. The
+weekly stats query then groups the rollups by week inside the database and
+reads O(weeks x items) rows, independent of how large orders/order_items grow.
+
+Every order would otherwise update the same per-day row, so concurrent orders
+queue up on its row lock for the rest of their transactions. The per-day
+totals are therefore split over ``ORDER_ROLLUP_SHARDS`` rows: each transaction
+adds to a random shard and readers sum them.
+"""
+from datetime import date, datetime, timedelta
+import os
+import random
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from upsert import upsert
+import models
+
+ORDER_ROLLUP_SHARDS = int(os.getenv("ORDER_ROLLUP_SHARDS", "16"))
+
+def week_start_of(day: date) -> date:
+    """Monday of the week containing ``day``"""
+    return day - timedelta(days=day.weekday())
+
+def _as_date(value) -> date:
+    # DATE() comes back as a date on MySQL but as a string on SQLite
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+def _add_order_rows(db: Session, order_rows: list[dict]):
+    upsert(db, models.DailyOrderRollup.__table__, order_rows, ["day", "shard"], lambda new: {
+        "order_count": models.DailyOrderRollup.order_count + new.order_count,
+        "total_amount": models.DailyOrderRollup.total_amount + new.total_amount,
+    })
+
+def _add_item_rows(db: Session, item_rows: list[dict]):
+    upsert(db, models.DailyItemRollup.__table__, item_rows, ["day", "item_id"], lambda new: {
+        "quantity": models.DailyItemRollup.quantity + new.quantity,
+        "amount": models.DailyItemRollup.amount + new.amount,
+    })
+
+def record_orders(db: Session, orders: list[tuple[datetime, float, list[dict]]]):
+    """Add ``(order_date, total_amount, lines)`` tuples to the rollups.
+
+    Each line is a dict with ``item_id``, ``quantity`` and ``subtotal``. Rows are
+    aggregated in memory first so a batch costs one upsert per touched day and
+    one per touched (day, item) pair; the batch's day totals all go to one
+    randomly chosen shard.
+    """
+    shard = random.randrange(ORDER_ROLLUP_SHARDS)
+    days = {}
+    day_items = {}
+    for order_date, total_amount, lines in orders:
+        day = order_date.date()
+        totals = days.setdefault(day, {"day": day, "shard": shard, "week_start": week_start_of(day), "order_count": 0, "total_amount": 0.0})
+        totals["order_count"] += 1
+        totals["total_amount"] += total_amount
+        for line in lines:
+            key = (day, line["item_id"])
+            row = day_items.setdefault(key, {"day": day, "item_id": line["item_id"], "week_start": week_start_of(day), "quantity": 0, "amount": 0.0})
+            row["quantity"] += line["quantity"]
+            row["amount"] += line["subtotal"]
+
+    # Sorted so concurrent writers touch rollup rows in the same order
+    _add_order_rows(db, [days[k] for k in sorted(days)])
+    _add_item_rows(db, [day_items[k] for k in sorted(day_items)])
+
+def record_order(db: Session, order_date: datetime, total_amount: float, lines: list[dict]):
+    """Add a single order to the rollups (see ``record_orders``)"""
+    record_orders(db, [(order_date, total_amount, lines)])
+
+def weekly_stats(db: Session, start_date: datetime) -> list[dict]:
+    """Weekly order totals and per-item quantities for days on or after ``start_date``"""
+    first_day = start_date.date()
+    order_rollup = models.DailyOrderRollup
+    item_rollup = models.DailyItemRollup
+
+    totals = db.query(
+        order_rollup.week_start,
+        func.sum(order_rollup.order_count),
+        func.sum(order_rollup.total_amount),
+    ).filter(
+        order_rollup.day >= first_day
+    ).group_by(order_rollup.week_start).order_by(order_rollup.week_start).all()
+
+    weekly_stats = {}
+    for week_start, order_count, total_amount in totals:
+        week_start = _as_date(week_start)
+        weekly_stats[week_start] = {
+            "week_start": week_start.strftime("%Y-%m-%d"),
+            "week_end": (week_start + timedelta(days=6)).strftime("%Y-%m-%d"),
+            "total_orders": int(order_count or 0),
+            "total_amount": float(total_amount or 0.0),
+            "item_counts": {}
+        }
+
+    item_counts = db.query(
+        item_rollup.week_start,
+        models.Item.name,
+        func.sum(item_rollup.quantity),
+    ).join(
+        models.Item, models.Item.id == item_rollup.item_id
+    ).filter(
+        item_rollup.day >= first_day
+    ).group_by(item_rollup.week_start, models.Item.name).all()
+
+    for week_start, item_name, quantity in item_counts:
+        stats = weekly_stats.get(_as_date(week_start))
+        if stats is not None:
+            stats["item_counts"][item_name] = int(quantity)
+
+    return list(weekly_stats.values())
+
+def rebuild(db: Session):
+    """Recompute all rollups from orders/order_items with two GROUP BY queries.
+
+    Used to backfill databases that already hold orders; the caller commits.
+    """
+    db.query(models.DailyItemRollup).delete(synchronize_session=False)
+    db.query(models.DailyOrderRollup).delete(synchronize_session=False)
+
+    order_day = func.date(models.Order.order_date)
+    order_rows = []
+    for day, order_count, total_amount in db.query(
+        order_day, func.count(models.Order.id), func.sum(models.Order.total_amount)
+    ).group_by(order_day):
+        day = _as_date(day)
+        order_rows.append({"day": day, "shard": 0, "week_start": week_start_of(day), "order_count": order_count, "total_amount": total_amount or 0.0})
+
+    item_rows = []
+    for day, item_id, quantity, amount in db.query(
+        order_day, models.OrderItem.item_id, func.sum(models.OrderItem.quantity), func.sum(models.OrderItem.subtotal)
+    ).join(models.Order, models.Order.id == models.OrderItem.order_id).group_by(order_day, models.OrderItem.item_id):
+        day = _as_date(day)
+        item_rows.append({"day": day, "item_id": item_id, "week_start": week_start_of(day), "quantity": quantity, "amount": amount or 0.0})
+
+    if order_rows:
+        db.execute(models.DailyOrderRollup.__table__.insert(), order_rows)
+    if item_rows:
+        db.execute(models.DailyItemRollup.__table__.insert(), item_rows)
+
+def ensure_built(db: Session):
+    """Backfill the rollups when orders exist but the rollup tables are empty"""
+    if db.query(models.DailyOrderRollup.day).first() is not None:
+        return
+    if db.query(models.Order.id).first() is None:
+        return
+    rebuild(db)
+    db.commit()
+
+if __name__ == "__main__":
+    from database import engine
+    import migrations
+    migrations.migrate(engine)
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        db.commit()
+        print("Order rollups rebuilt successfully!")
+    finally:
+        db.close()
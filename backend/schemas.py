@@ -1,83 +1,188 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-
-class ItemBase(BaseModel):
-    name: str
-    item_type: str
-    cost: float
-    description: Optional[str] = None
-
-class ItemCreate(ItemBase):
-    pass
-
-class ItemUpdate(BaseModel):
-    name: Optional[str] = None
-    item_type: Optional[str] = None
-    cost: Optional[float] = None
-    description: Optional[str] = None
-
-class ItemResponse(ItemBase):
-    id: int
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
-
-class InventoryBase(BaseModel):
-    item_id: int
-    quantity: int
-
-class InventoryCreate(InventoryBase):
-    pass
-
-class InventoryUpdate(BaseModel):
-    quantity: int
-
-class InventoryResponse(BaseModel):
-    id: int
-    item_id: int
-    quantity: int
-    item: ItemResponse
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
-
-class OrderItemCreate(BaseModel):
-    item_id: int
-    quantity: int
-
-class OrderCreate(BaseModel):
-    items: list[OrderItemCreate]
-
-class OrderItemResponse(BaseModel):
-    id: int
-    item_id: int
-    quantity: int
-    unit_price: float
-    subtotal: float
-    item: ItemResponse
-    
-    class Config:
-        from_attributes = True
-
-class OrderResponse(BaseModel):
-    id: int
-    order_date: datetime
-    total_amount: float
-    created_at: datetime
-    order_items: list[OrderItemResponse]
-    
-    class Config:
-        from_attributes = True
-
-class WeeklyOrderStats(BaseModel):
-    week_start: str
-    week_end: str
-    total_orders: int
-    total_amount: float
-    item_counts: dict[str, int]
-
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class ItemBase(BaseModel):
+    name: str
+    item_type: str
+    cost: float
+    description: Optional[str] = None
+
+class ItemCreate(ItemBase):
+    pass
+
+class ItemUpdate(BaseModel):
+    name: Optional[str] = None
+    item_type: Optional[str] = None
+    cost: Optional[float] = None
+    description: Optional[str] = None
+
+class ItemResponse(ItemBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class ItemTypeCount(BaseModel):
+    item_type: str
+    count: int
+
+class InventoryBase(BaseModel):
+    item_id: int
+    quantity: int
+
+class InventoryCreate(InventoryBase):
+    pass
+
+class InventoryUpdate(BaseModel):
+    quantity: int
+
+class InventoryResponse(BaseModel):
+    id: int
+    item_id: int
+    quantity: int
+    item: ItemResponse
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class InventoryLevel(BaseModel):
+    id: int
+    item_id: int
+    quantity: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class Dashboard(BaseModel):
+    sequence: int
+    items: list[ItemResponse]
+    inventory: list[InventoryLevel]
+
+class InventoryForecast(BaseModel):
+    item_id: int
+    name: str
+    item_type: str
+    quantity: int
+    avg_7d: float
+    avg_28d: float
+    avg_90d: float
+    daily_demand: float
+    demand_std: float
+    days_of_cover: Optional[float] = None
+    reorder_point: float
+    low_stock: bool
+
+class InventoryMovementResponse(BaseModel):
+    id: int
+    item_id: int
+    quantity_change: int
+    reason: str
+    order_id: Optional[int] = None
+    occurred_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class StockAt(BaseModel):
+    item_id: int
+    at: datetime
+    quantity: int
+    snapshot_at: Optional[datetime] = None
+
+class StockLevel(BaseModel):
+    item_id: int
+    quantity: int
+
+class MovementRange(BaseModel):
+    item_id: int
+    start: datetime
+    end: datetime
+    opening_quantity: int
+    closing_quantity: int
+    movements: list[InventoryMovementResponse]
+
+class OrderItemCreate(BaseModel):
+    item_id: int
+    quantity: int = Field(gt=0)
+
+class OrderCreate(BaseModel):
+    items: list[OrderItemCreate]
+
+class OrderItemResponse(BaseModel):
+    id: int
+    item_id: int
+    quantity: int
+    unit_price: float
+    subtotal: float
+    item: ItemResponse
+    
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    order_date: datetime
+    total_amount: float
+    created_at: datetime
+    order_items: list[OrderItemResponse]
+    
+    class Config:
+        from_attributes = True
+
+class WeeklyOrderStats(BaseModel):
+    week_start: str
+    week_end: str
+    total_orders: int
+    total_amount: float
+    item_counts: dict[str, int]
+
+
+class RevenueByType(BaseModel):
+    item_type: str
+    lines: int
+    quantity: int
+    revenue: float
+
+class TopItem(BaseModel):
+    item_id: int
+    name: Optional[str] = None
+    item_type: Optional[str] = None
+    lines: int
+    quantity: int
+    revenue: float
+
+class SalesPeriod(BaseModel):
+    period: str
+    lines: int
+    quantity: int
+    revenue: float
+
+class BulkOrderCreate(BaseModel):
+    orders: list[OrderCreate]
+
+class BulkOrderResult(BaseModel):
+    index: int
+    success: bool
+    order_id: Optional[int] = None
+    total_amount: Optional[float] = None
+    error: Optional[str] = None
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkOrderResult]
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
@@ -0,0 +1,114 @@
+"""
+Server-side search and filters for the item and inventory listings
+
+- ``q`` is a word search over name and description through the full-text
+  index (MySQL FULLTEXT, SQLite FTS5) that migration 3 creates, so the schema
+  must be migrated. Every word must match, as a prefix: ``?q=mri 3t`` finds
+  "MRI Machine - 3T".
+- ``name_prefix`` is an index range scan on ``items.name``; ``name_contains``
+  is a plain substring match and therefore scans.
+- ``item_type``, ``min_cost``/``max_cost`` and, on inventory,
+  ``min_quantity``/``max_quantity`` (``max_quantity=5`` lists low stock) are
+  served by indexes on those columns.
+
+Filters combine with AND and with the keyset pagination and ETags of the
+listings they are applied to.
+"""
+from typing import Optional
+import re
+from fastapi import Query
+from sqlalchemy import Integer, and_, column, func, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+import models
+
+FULLTEXT_INDEX = "ft_items_name_description"
+FTS_TABLE = "items_fts"
+
+class ItemFilters:
+    def __init__(self, q: Optional[str] = None, name_prefix: Optional[str] = None, name_contains: Optional[str] = None,
+                 item_type: Optional[str] = None, min_cost: Optional[float] = None, max_cost: Optional[float] = None):
+        self.q = q
+        self.name_prefix = name_prefix
+        self.name_contains = name_contains
+        self.item_type = item_type
+        self.min_cost = min_cost
+        self.max_cost = max_cost
+
+    def active(self) -> bool:
+        return any(value is not None for value in vars(self).values())
+
+def item_filters(
+    q: Optional[str] = Query(None, description="words in name or description"),
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    name_contains: Optional[str] = Query(None, min_length=1),
+    item_type: Optional[str] = None,
+    min_cost: Optional[float] = Query(None, ge=0),
+    max_cost: Optional[float] = Query(None, ge=0),
+) -> ItemFilters:
+    """Query parameter dependency for the item filters"""
+    return ItemFilters(q, name_prefix, name_contains, item_type, min_cost, max_cost)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _word_search(db: Session, q: str):
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return match(models.Item.name, models.Item.description,
+                     against=" ".join(f"+{word}*" for word in words)).in_boolean_mode()
+    if dialect == "sqlite":
+        ids = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :terms").bindparams(
+            terms=" ".join(f'"{word}"*' for word in words)
+        ).columns(column("rowid", Integer))
+        return models.Item.id.in_(ids)
+    # No full-text index on other databases: substring match on each word
+    return and_(*[
+        func.lower(models.Item.name).contains(word.lower(), autoescape=True)
+        | func.lower(func.coalesce(models.Item.description, "")).contains(word.lower(), autoescape=True)
+        for word in words
+    ])
+
+def _name_prefix(db: Session, prefix: str):
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite only turns LIKE into an index range under NOCASE collation,
+        # so compare against the range of strings starting with the prefix
+        return and_(models.Item.name >= prefix, models.Item.name < prefix + "\U0010ffff")
+    return models.Item.name.like(_escape_like(prefix) + "%", escape="\\")
+
+def item_conditions(db: Session, filters: ItemFilters, include_type: bool = True) -> list:
+    """WHERE clauses on ``models.Item`` for ``filters``"""
+    conditions = []
+    if filters.q:
+        condition = _word_search(db, filters.q)
+        if condition is not None:
+            conditions.append(condition)
+    if filters.name_prefix:
+        conditions.append(_name_prefix(db, filters.name_prefix))
+    if filters.name_contains:
+        conditions.append(models.Item.name.contains(filters.name_contains, autoescape=True))
+    if include_type and filters.item_type is not None:
+        conditions.append(models.Item.item_type == filters.item_type)
+    if filters.min_cost is not None:
+        conditions.append(models.Item.cost >= filters.min_cost)
+    if filters.max_cost is not None:
+        conditions.append(models.Item.cost <= filters.max_cost)
+    return conditions
+
+def quantity_conditions(min_quantity: Optional[int], max_quantity: Optional[int]) -> list:
+    conditions = []
+    if min_quantity is not None:
+        conditions.append(models.Inventory.quantity >= min_quantity)
+    if max_quantity is not None:
+        conditions.append(models.Inventory.quantity <= max_quantity)
+    return conditions
+
+def item_type_counts(db: Session, filters: ItemFilters) -> list[dict]:
+    """Number of items per item_type matching ``filters`` (ignoring its own item_type)"""
+    rows = db.query(models.Item.item_type, func.count()).filter(
+        *item_conditions(db, filters, include_type=False)
+    ).group_by(models.Item.item_type).order_by(models.Item.item_type)
+    return [{"item_type": item_type, "count": count} for item_type, count in rows]
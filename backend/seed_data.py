@@ -1,140 +1,337 @@
-"""
-Seed script to populate the database with initial medical equipment data
-"""
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine
-import models
-
-# Medical equipment items
-MEDICAL_ITEMS = [
-    {"name": "MRI Machine - 3T", "item_type": "MRI Machine", "cost": 1500000.00, "description": "High-field 3 Tesla MRI scanner for advanced imaging"},
-    {"name": "CT Scanner - 64 Slice", "item_type": "CT Scanner", "cost": 800000.00, "description": "64-slice computed tomography scanner"},
-    {"name": "X-Ray Machine - Digital", "item_type": "X-Ray Machine", "cost": 120000.00, "description": "Digital radiography system"},
-    {"name": "Ultrasound System - Portable", "item_type": "Ultrasound Machine", "cost": 45000.00, "description": "Portable ultrasound imaging system"},
-    {"name": "Ventilator - ICU", "item_type": "Ventilator", "cost": 35000.00, "description": "Intensive care unit ventilator"},
-    {"name": "Defibrillator - AED", "item_type": "Defibrillator", "cost": 1500.00, "description": "Automated external defibrillator"},
-    {"name": "Patient Monitor - Multi-parameter", "item_type": "Patient Monitor", "cost": 8000.00, "description": "Multi-parameter patient monitoring system"},
-    {"name": "Surgical Table - Electric", "item_type": "Surgical Equipment", "cost": 25000.00, "description": "Electric adjustable surgical table"},
-    {"name": "Anesthesia Machine", "item_type": "Anesthesia Equipment", "cost": 55000.00, "description": "Modern anesthesia delivery system"},
-    {"name": "Dialysis Machine", "item_type": "Dialysis Equipment", "cost": 28000.00, "description": "Hemodialysis machine"},
-]
-
-def seed_database():
-    db: Session = SessionLocal()
-    
-    try:
-        # Create items
-        created_items = []
-        for item_data in MEDICAL_ITEMS:
-            # Check if item already exists
-            existing = db.query(models.Item).filter(models.Item.name == item_data["name"]).first()
-            if not existing:
-                item = models.Item(**item_data)
-                db.add(item)
-                created_items.append(item)
-            else:
-                created_items.append(existing)
-        
-        db.commit()
-        
-        # Refresh to get IDs
-        for item in created_items:
-            db.refresh(item)
-        
-        # Create initial inventory entries with higher quantities (to account for historical orders)
-        inventory_quantities = [5, 8, 12, 15, 10, 25, 20, 8, 7, 10]  # Higher quantities for each item
-        
-        for i, item in enumerate(created_items):
-            # Check if inventory entry exists
-            existing_inv = db.query(models.Inventory).filter(models.Inventory.item_id == item.id).first()
-            if not existing_inv:
-                inventory = models.Inventory(
-                    item_id=item.id,
-                    quantity=inventory_quantities[i]
-                )
-                db.add(inventory)
-        
-        db.commit()
-        
-        # Refresh inventory entries
-        inventory_entries = {}
-        for item in created_items:
-            inv = db.query(models.Inventory).filter(models.Inventory.item_id == item.id).first()
-            if inv:
-                inventory_entries[item.id] = inv
-        
-        # Create some sample orders for historical data
-        from datetime import datetime, timedelta
-        import random
-        
-        # Create orders over the past 12 weeks
-        sample_orders = []
-        for week in range(12):
-            week_start = datetime.now() - timedelta(weeks=12-week)
-            # Create 1-3 orders per week
-            num_orders = random.randint(1, 3)
-            for order_num in range(num_orders):
-                order_date = week_start + timedelta(days=random.randint(0, 6), hours=random.randint(9, 17))
-                
-                # Select 1-3 random items for each order
-                num_items = random.randint(1, 3)
-                selected_items = random.sample(created_items, min(num_items, len(created_items)))
-                
-                total_amount = 0.0
-                order_items_list = []
-                
-                for item in selected_items:
-                    # Use a small quantity for historical orders (1-2 items)
-                    quantity = random.randint(1, 2)
-                    subtotal = item.cost * quantity
-                    total_amount += subtotal
-                    order_items_list.append({
-                        "item": item,
-                        "quantity": quantity,
-                        "unit_price": item.cost,
-                        "subtotal": subtotal
-                    })
-                
-                if order_items_list and total_amount > 0:
-                    # Create order
-                    order = models.Order(order_date=order_date, total_amount=total_amount)
-                    db.add(order)
-                    db.flush()
-                    
-                    # Create order items and update inventory
-                    for oi_data in order_items_list:
-                        order_item = models.OrderItem(
-                            order_id=order.id,
-                            item_id=oi_data["item"].id,
-                            quantity=oi_data["quantity"],
-                            unit_price=oi_data["unit_price"],
-                            subtotal=oi_data["subtotal"]
-                        )
-                        db.add(order_item)
-                        
-                        # Update inventory (reduce quantity)
-                        inv = inventory_entries.get(oi_data["item"].id)
-                        if inv:
-                            inv.quantity -= oi_data["quantity"]
-                            if inv.quantity < 0:
-                                inv.quantity = 0
-                    
-                    sample_orders.append(order)
-        
-        db.commit()
-        print("Database seeded successfully!")
-        print(f"Created {len(created_items)} items with inventory entries")
-        print(f"Created {len(sample_orders)} sample orders for historical data")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"Error seeding database: {e}")
-        raise
-    finally:
-        db.close()
-
-if __name__ == "__main__":
-    # Create tables if they don't exist
-    models.Base.metadata.create_all(bind=engine)
-    seed_database()
-
+"""
+Seed script to populate the database with initial medical equipment data
+
+``seed_database()`` creates the small demo catalog used on first start.
+``generate()`` builds a synthetic dataset of any size for load testing:
+deterministic for a given seed and end date, with Zipf-skewed item
+popularity, written through batched bulk inserts or straight to CSV/NDJSON
+files (one per table).
+
+    python seed_data.py
+    python seed_data.py generate --items 20000 --orders 5000000 --lines 1-8 --days 730
+    python seed_data.py generate --orders 10000000 --output csv --out-dir /data/synthetic
+"""
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine
+import ledger
+import migrations
+import models
+import rollups
+
+# Medical equipment items
+MEDICAL_ITEMS = [
+    {"name": "MRI Machine - 3T", "item_type": "MRI Machine", "cost": 1500000.00, "description": "High-field 3 Tesla MRI scanner for advanced imaging"},
+    {"name": "CT Scanner - 64 Slice", "item_type": "CT Scanner", "cost": 800000.00, "description": "64-slice computed tomography scanner"},
+    {"name": "X-Ray Machine - Digital", "item_type": "X-Ray Machine", "cost": 120000.00, "description": "Digital radiography system"},
+    {"name": "Ultrasound System - Portable", "item_type": "Ultrasound Machine", "cost": 45000.00, "description": "Portable ultrasound imaging system"},
+    {"name": "Ventilator - ICU", "item_type": "Ventilator", "cost": 35000.00, "description": "Intensive care unit ventilator"},
+    {"name": "Defibrillator - AED", "item_type": "Defibrillator", "cost": 1500.00, "description": "Automated external defibrillator"},
+    {"name": "Patient Monitor - Multi-parameter", "item_type": "Patient Monitor", "cost": 8000.00, "description": "Multi-parameter patient monitoring system"},
+    {"name": "Surgical Table - Electric", "item_type": "Surgical Equipment", "cost": 25000.00, "description": "Electric adjustable surgical table"},
+    {"name": "Anesthesia Machine", "item_type": "Anesthesia Equipment", "cost": 55000.00, "description": "Modern anesthesia delivery system"},
+    {"name": "Dialysis Machine", "item_type": "Dialysis Equipment", "cost": 28000.00, "description": "Hemodialysis machine"},
+]
+
+def seed_database():
+    db: Session = SessionLocal()
+    
+    try:
+        # Create items
+        created_items = []
+        for item_data in MEDICAL_ITEMS:
+            # Check if item already exists
+            existing = db.query(models.Item).filter(models.Item.name == item_data["name"]).first()
+            if not existing:
+                item = models.Item(**item_data)
+                db.add(item)
+                created_items.append(item)
+            else:
+                created_items.append(existing)
+        
+        db.commit()
+        
+        # Refresh to get IDs
+        for item in created_items:
+            db.refresh(item)
+        
+        # Create initial inventory entries with higher quantities (to account for historical orders)
+        inventory_quantities = [5, 8, 12, 15, 10, 25, 20, 8, 7, 10]  # Higher quantities for each item
+        
+        for i, item in enumerate(created_items):
+            # Check if inventory entry exists
+            existing_inv = db.query(models.Inventory).filter(models.Inventory.item_id == item.id).first()
+            if not existing_inv:
+                inventory = models.Inventory(
+                    item_id=item.id,
+                    quantity=inventory_quantities[i]
+                )
+                db.add(inventory)
+        
+        db.commit()
+        
+        # Refresh inventory entries
+        inventory_entries = {}
+        for item in created_items:
+            inv = db.query(models.Inventory).filter(models.Inventory.item_id == item.id).first()
+            if inv:
+                inventory_entries[item.id] = inv
+        
+        # Create some sample orders for historical data
+        # Create orders over the past 12 weeks
+        sample_orders = []
+        for week in range(12):
+            week_start = datetime.now() - timedelta(weeks=12-week)
+            # Create 1-3 orders per week
+            num_orders = random.randint(1, 3)
+            for order_num in range(num_orders):
+                order_date = week_start + timedelta(days=random.randint(0, 6), hours=random.randint(9, 17))
+                
+                # Select 1-3 random items for each order
+                num_items = random.randint(1, 3)
+                selected_items = random.sample(created_items, min(num_items, len(created_items)))
+                
+                total_amount = 0.0
+                order_items_list = []
+                
+                for item in selected_items:
+                    # Use a small quantity for historical orders (1-2 items)
+                    quantity = random.randint(1, 2)
+                    subtotal = item.cost * quantity
+                    total_amount += subtotal
+                    order_items_list.append({
+                        "item": item,
+                        "quantity": quantity,
+                        "unit_price": item.cost,
+                        "subtotal": subtotal
+                    })
+                
+                if order_items_list and total_amount > 0:
+                    # Create order
+                    order = models.Order(order_date=order_date, total_amount=total_amount)
+                    db.add(order)
+                    db.flush()
+                    
+                    # Create order items and update inventory
+                    for oi_data in order_items_list:
+                        order_item = models.OrderItem(
+                            order_id=order.id,
+                            item_id=oi_data["item"].id,
+                            quantity=oi_data["quantity"],
+                            unit_price=oi_data["unit_price"],
+                            subtotal=oi_data["subtotal"]
+                        )
+                        db.add(order_item)
+                        
+                        # Update inventory (reduce quantity)
+                        inv = inventory_entries.get(oi_data["item"].id)
+                        if inv:
+                            inv.quantity -= oi_data["quantity"]
+                            if inv.quantity < 0:
+                                inv.quantity = 0
+                    
+                    sample_orders.append(order)
+        
+        # Populate the weekly stats rollups from the orders created above, and
+        # enter the resulting stock in the ledger
+        db.flush()
+        rollups.rebuild(db)
+        ledger.reconcile(db, "opening")
+        
+        db.commit()
+        print("Database seeded successfully!")
+        print(f"Created {len(created_items)} items with inventory entries")
+        print(f"Created {len(sample_orders)} sample orders for historical data")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"Error seeding database: {e}")
+        raise
+    finally:
+        db.close()
+
+GENERATED_TABLES = {
+    "items": ["id", "name", "item_type", "cost", "description", "created_at"],
+    "inventory": ["id", "item_id", "quantity", "created_at"],
+    "orders": ["id", "order_date", "total_amount", "created_at"],
+    "order_items": ["id", "order_id", "item_id", "quantity", "unit_price", "subtotal"],
+}
+
+class _DatabaseSink:
+    """Bulk INSERTs through Core, one executemany and commit per batch"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.tables = {table.name: table for table in models.Base.metadata.sorted_tables}
+
+    def write(self, table: str, rows: list):
+        columns = GENERATED_TABLES[table]
+        self.db.execute(self.tables[table].insert(), [dict(zip(columns, row)) for row in rows])
+        self.db.commit()
+
+    def close(self):
+        # Weekly stats read the rollups, so derive them from the new orders;
+        # the generated stock enters the movement ledger as opening balances
+        rollups.rebuild(self.db)
+        ledger.reconcile(self.db, "opening")
+        self.db.commit()
+
+class _FileSink:
+    """One ``<table>.csv`` / ``<table>.ndjson`` file per table in ``out_dir``"""
+
+    def __init__(self, out_dir: str, fmt: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self.fmt = fmt
+        self.files = {}
+        self.writers = {}
+        for table, columns in GENERATED_TABLES.items():
+            f = self.files[table] = open(os.path.join(out_dir, f"{table}.{fmt}"), "w", newline="", encoding="utf-8")
+            if fmt == "csv":
+                self.writers[table] = csv.writer(f)
+                self.writers[table].writerow(columns)
+
+    def write(self, table: str, rows: list):
+        rows = [[value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows]
+        if self.fmt == "csv":
+            self.writers[table].writerows(rows)
+        else:
+            columns = GENERATED_TABLES[table]
+            self.files[table].write("".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows))
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+def zipf_cum_weights(n: int, s: float) -> list[float]:
+    """Cumulative weights for ``random.choices``: rank r is picked with probability ~ 1 / r**s"""
+    return list(accumulate(1.0 / rank ** s for rank in range(1, n + 1)))
+
+def _parse_range(value: str) -> tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+def generate(items: int = 1000, item_types: int = 50, orders: int = 100000, lines: tuple[int, int] = (1, 5),
+             quantity: tuple[int, int] = (1, 3), days: int = 365, zipf_s: float = 1.1, seed: int = 42,
+             end_date: date = None, batch_size: int = 10000, output: str = "db", out_dir: str = "synthetic") -> dict:
+    """Generate items, inventory, orders and order lines; returns row counts per table.
+
+    Ids are assigned here rather than by the database so order lines can be
+    written in the same batches as their orders; they continue after the
+    current maximum ids when appending to a database. Order dates are spread
+    evenly (with jitter) over the ``days`` before ``end_date``, in id order.
+    """
+    rng = random.Random(seed)
+    end = datetime.combine(end_date or date.today(), datetime.min.time())
+    start = end - timedelta(days=days)
+
+    db = None
+    offsets = dict.fromkeys(GENERATED_TABLES, 0)
+    if output == "db":
+        db = SessionLocal()
+        sink = _DatabaseSink(db)
+        offsets = {name: db.query(func.coalesce(func.max(sink.tables[name].c.id), 0)).scalar() for name in GENERATED_TABLES}
+    else:
+        sink = _FileSink(out_dir, output)
+
+    counts = dict.fromkeys(GENERATED_TABLES, 0)
+    try:
+        # Catalog: the demo item types first, then numbered classes
+        base_types = list(dict.fromkeys(item["item_type"] for item in MEDICAL_ITEMS))
+        type_names = (base_types + [f"Equipment Class {n}" for n in range(len(base_types) + 1, item_types + 1)])[:item_types]
+        catalog = []
+        for n in range(1, items + 1):
+            item_id = offsets["items"] + n
+            item_type = type_names[rng.randrange(len(type_names))]
+            cost = round(10 ** rng.uniform(2, 6), 2)
+            catalog.append((item_id, f"{item_type} #{item_id:07d}", item_type, cost,
+                            f"Synthetic {item_type.lower()} generated with seed {seed}", start))
+        inventory = [(offsets["inventory"] + n, item[0], rng.randint(0, 500), start) for n, item in enumerate(catalog, 1)]
+        for table, rows in (("items", catalog), ("inventory", inventory)):
+            for i in range(0, len(rows), batch_size):
+                sink.write(table, rows[i:i + batch_size])
+            counts[table] = len(rows)
+
+        # Popularity ranks are shuffled so the best sellers are not simply the lowest ids
+        popular = [(item[0], item[3]) for item in catalog]
+        rng.shuffle(popular)
+        cum_weights = zipf_cum_weights(len(popular), zipf_s)
+        step = days * 86400 / max(orders, 1)
+        qty_low, qty_span = quantity[0], quantity[1] - quantity[0] + 1
+        line_id = offsets["order_items"]
+        order_rows, line_rows = [], []
+        for n in range(orders):
+            order_id = offsets["orders"] + n + 1
+            order_date = start + timedelta(seconds=int((n + rng.random()) * step))
+            picks = rng.choices(popular, cum_weights=cum_weights, k=rng.randint(*lines))
+            total = 0.0
+            for item_id, cost in dict(picks).items():
+                qty = qty_low + int(rng.random() * qty_span)
+                subtotal = round(cost * qty, 2)
+                total += subtotal
+                line_id += 1
+                line_rows.append((line_id, order_id, item_id, qty, cost, subtotal))
+            order_rows.append((order_id, order_date, round(total, 2), order_date))
+            if len(line_rows) >= batch_size:
+                sink.write("orders", order_rows)
+                sink.write("order_items", line_rows)
+                counts["orders"] += len(order_rows)
+                counts["order_items"] += len(line_rows)
+                order_rows, line_rows = [], []
+        if order_rows:
+            sink.write("orders", order_rows)
+            sink.write("order_items", line_rows)
+            counts["orders"] += len(order_rows)
+            counts["order_items"] += len(line_rows)
+        sink.close()
+    except Exception:
+        if db is not None:
+            db.rollback()
+        raise
+    finally:
+        if db is not None:
+            db.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["demo", "generate"], default="demo")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--item-types", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--lines", type=_parse_range, default=(1, 5), help="lines per order, e.g. 1-5")
+    parser.add_argument("--quantity", type=_parse_range, default=(1, 3), help="quantity per line, e.g. 1-3")
+    parser.add_argument("--days", type=int, default=365, help="date span of the orders")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="orders end before this day (default today); fix it for reproducible data")
+    parser.add_argument("--zipf", type=float, default=1.1, help="item popularity skew, 0 for uniform")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--output", choices=["db", "csv", "ndjson"], default="db")
+    parser.add_argument("--out-dir", default="synthetic", help="directory for csv/ndjson output")
+    args = parser.parse_args()
+
+    # Bring the schema up to date
+    if args.command == "demo" or args.output == "db":
+        migrations.migrate(engine)
+    if args.command == "demo":
+        seed_database()
+        return
+
+    started = time.perf_counter()
+    counts = generate(args.items, args.item_types, args.orders, args.lines, args.quantity, args.days, args.zipf,
+                      args.seed, args.end_date, args.batch_size, args.output, args.out_dir)
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Generated {summary} in {elapsed:.1f}s ({counts['order_items'] / elapsed:,.0f} order lines/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,97 @@
+"""
+Fast response serialization for list endpoints
+
+With ``?fast=true`` the list endpoints build plain dicts straight from the
+eager-loaded ORM rows and encode them with orjson, skipping the Pydantic
+validation that ``response_model`` runs over every nested object. The JSON has
+the same shape as the validated responses.
+
+With ``?normalized=true`` each referenced item is emitted once in an ``items``
+side table keyed by id, and inventory rows / order lines only carry
+``item_id``; large order listings otherwise repeat the same item objects, with
+their descriptions, hundreds of times.
+
+The same dicts make up ``GET /api/dashboard`` and the change feed events (see
+change_feed.py), so clients merge them into what they loaded without mapping.
+"""
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+import models
+
+def item_dict(item: models.Item) -> dict:
+    return {
+        "name": item.name,
+        "item_type": item.item_type,
+        "cost": item.cost,
+        "description": item.description,
+        "id": item.id,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
+
+def inventory_row(inv: models.Inventory) -> dict:
+    return {
+        "id": inv.id,
+        "item_id": inv.item_id,
+        "quantity": inv.quantity,
+        "created_at": inv.created_at,
+        "updated_at": inv.updated_at,
+    }
+
+def _order_item_row(order_item: models.OrderItem) -> dict:
+    return {
+        "id": order_item.id,
+        "item_id": order_item.item_id,
+        "quantity": order_item.quantity,
+        "unit_price": order_item.unit_price,
+        "subtotal": order_item.subtotal,
+    }
+
+def _order_row(order: models.Order, order_items: list) -> dict:
+    return {
+        "id": order.id,
+        "order_date": order.order_date,
+        "total_amount": order.total_amount,
+        "created_at": order.created_at,
+        "order_items": order_items,
+    }
+
+def _side_table(items) -> dict:
+    return {str(item.id): item_dict(item) for item in items}
+
+def items_payload(items: list) -> list:
+    return [item_dict(item) for item in items]
+
+def inventory_payload(inventory: list, normalized: bool = False):
+    if normalized:
+        return {
+            "items": _side_table({inv.item for inv in inventory}),
+            "inventory": [inventory_row(inv) for inv in inventory],
+        }
+    return [{**inventory_row(inv), "item": item_dict(inv.item)} for inv in inventory]
+
+def orders_payload(orders: list, normalized: bool = False):
+    if normalized:
+        return {
+            "items": _side_table({oi.item for order in orders for oi in order.order_items}),
+            "orders": [_order_row(order, [_order_item_row(oi) for oi in order.order_items]) for order in orders],
+        }
+    # Each distinct item is converted once and the dict shared between lines
+    item_dicts = {}
+    def nested(order_item):
+        item = item_dicts.get(order_item.item_id)
+        if item is None:
+            item = item_dicts[order_item.item_id] = item_dict(order_item.item)
+        return {**_order_item_row(order_item), "item": item}
+    return [_order_row(order, [nested(oi) for oi in order.order_items]) for order in orders]
+
+def dashboard_payload(sequence, items: list, inventory: list) -> dict:
+    return {
+        "sequence": sequence,
+        "items": items_payload(items),
+        "inventory": [inventory_row(inv) for inv in inventory],
+    }
+
+def fast_response(content, response: Response) -> ORJSONResponse:
+    """Encode ``content`` with orjson, keeping headers already set on ``response``"""
+    return ORJSONResponse(content, headers=dict(response.headers))
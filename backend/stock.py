@@ -0,0 +1,211 @@
+"""
+Concurrency-safe stock mutations
+
+Quantities are never read into Python and written back. Every change is a
+single conditional UPDATE evaluated by the database, e.g.
+
+    UPDATE inventory SET quantity = quantity - :n WHERE item_id = :id AND quantity >= :n
+
+so two concurrent orders for the last unit cannot both succeed. Orders touching
+several items decrement them in item_id order, which gives every transaction
+the same lock acquisition order, and ``run_in_transaction`` retries the whole
+unit of work a bounded number of times when the database reports a deadlock or
+lock wait timeout.
+
+Every function here also appends the resulting stock changes to the movement
+ledger (see ledger.py) in the same transaction, one executemany per call, and
+the new stock rows to the change feed (see change_feed.py).
+"""
+from typing import Callable, Optional, TypeVar
+import asyncio
+import os
+import random
+import time
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+import change_feed
+import ledger
+import models
+
+T = TypeVar("T")
+
+MAX_ATTEMPTS = int(os.getenv("STOCK_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = 0.01  # seconds, doubled per attempt with jitter
+
+# MySQL: 1213 deadlock found, 1205 lock wait timeout exceeded
+RETRYABLE_MYSQL_ERRORS = {1213, 1205}
+
+class InsufficientStock(Exception):
+    def __init__(self, item_id: int):
+        super().__init__(f"Insufficient inventory for item {item_id}")
+        self.item_id = item_id
+
+def is_retryable(error: OperationalError) -> bool:
+    orig = error.orig
+    code = orig.args[0] if getattr(orig, "args", None) else None
+    return code in RETRYABLE_MYSQL_ERRORS or "database is locked" in str(orig)
+
+def run_in_transaction(db: Session, work: Callable[[Session], T], attempts: int = MAX_ATTEMPTS) -> T:
+    """Run ``work(db)`` and commit, retrying on deadlocks with jittered backoff.
+
+    ``work`` must be safe to re-run from scratch: the session is rolled back
+    before every retry and on any other error.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            result = work(db)
+            db.commit()
+            return result
+        except OperationalError as e:
+            db.rollback()
+            if attempt == attempts or not is_retryable(e):
+                raise
+            _backoff(RETRY_BASE_DELAY * (2 ** (attempt - 1)) * (1 + random.random()))
+        except Exception:
+            db.rollback()
+            raise
+
+def _backoff(delay: float):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        time.sleep(delay)
+        return
+    # On the event loop, inside AsyncSession.run_sync (DB_MODE=async): wait
+    # through SQLAlchemy's greenlet bridge so other requests keep running
+    await_only(asyncio.sleep(delay))
+
+def _execute(db: Session, stmt):
+    # Inventory rows are never loaded into the session by the callers, so skip
+    # the ORM's in-session synchronization for these bulk statements
+    return db.execute(stmt.execution_options(synchronize_session=False))
+
+def reserve(db: Session, quantities: dict[int, int], order_id: Optional[int] = None):
+    """Take ``{item_id: quantity}`` out of stock for an order or raise ``InsufficientStock``.
+
+    Rows are decremented in item_id order; rows that reach zero are removed.
+    """
+    for item_id in sorted(quantities):
+        quantity = quantities[item_id]
+        result = _execute(db, update(models.Inventory).where(
+            models.Inventory.item_id == item_id,
+            models.Inventory.quantity >= quantity,
+        ).values(quantity=models.Inventory.quantity - quantity))
+        if result.rowcount == 0:
+            raise InsufficientStock(item_id)
+    purge_empty(db, sorted(quantities))
+    ledger.record(db, "order", {item_id: -quantity for item_id, quantity in quantities.items()}, order_id)
+    change_feed.inventory_changed(db, quantities)
+
+def lock_levels(db: Session, item_ids: list[int]) -> dict[int, int]:
+    """Read and row-lock the stock of ``item_ids`` in item_id order.
+
+    Used by batch callers that validate many orders in memory against the
+    locked levels and then apply them with ``apply_reservations``.
+    """
+    rows = db.execute(
+        select(models.Inventory.item_id, models.Inventory.quantity)
+        .where(models.Inventory.item_id.in_(item_ids))
+        .order_by(models.Inventory.item_id)
+        .with_for_update()
+    )
+    return {item_id: quantity for item_id, quantity in rows}
+
+def apply_reservations(db: Session, orders: list[tuple[int, dict[int, int]]]):
+    """Subtract the ``(order_id, {item_id: quantity})`` of a batch from rows locked by ``lock_levels``.
+
+    A single UPDATE with a CASE per item, followed by the usual purge of rows
+    that reached zero; the ledger gets one movement per order and item.
+    """
+    quantities = {}
+    for _, order_quantities in orders:
+        for item_id, quantity in order_quantities.items():
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+    quantities = {item_id: quantity for item_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+    _execute(db, update(models.Inventory).where(
+        models.Inventory.item_id.in_(sorted(quantities))
+    ).values(quantity=models.Inventory.quantity - case(quantities, value=models.Inventory.item_id, else_=0)))
+    purge_empty(db, sorted(quantities))
+    ledger.record_orders(db, orders)
+    change_feed.inventory_changed(db, quantities)
+
+def write_levels(db: Session, levels: dict[int, int], current: dict[int, int], reason: str = "import"):
+    """Set absolute stock levels for many items at once.
+
+    Rows in ``current`` (the levels locked by ``lock_levels``) get one CASE
+    update, the rest are inserted with a single executemany.
+    """
+    updates = {item_id: quantity for item_id, quantity in levels.items() if item_id in current}
+    inserts = [{"item_id": item_id, "quantity": quantity} for item_id, quantity in sorted(levels.items()) if item_id not in current]
+    if updates:
+        _execute(db, update(models.Inventory).where(
+            models.Inventory.item_id.in_(sorted(updates))
+        ).values(quantity=case(updates, value=models.Inventory.item_id)))
+    if inserts:
+        db.execute(insert(models.Inventory), inserts)
+    ledger.record(db, reason, {item_id: quantity - current.get(item_id, 0) for item_id, quantity in levels.items()})
+    change_feed.inventory_changed(db, levels)
+
+def restock(db: Session, item_id: int, quantity: int):
+    """Add ``quantity`` to an item's stock, creating its row if needed"""
+    result = _execute(db, update(models.Inventory).where(
+        models.Inventory.item_id == item_id
+    ).values(quantity=models.Inventory.quantity + quantity))
+    if not result.rowcount:
+        try:
+            # The unique key on item_id turns a concurrent first insert into an
+            # IntegrityError; fall back to the increment in that case
+            with db.begin_nested():
+                db.execute(insert(models.Inventory), [{"item_id": item_id, "quantity": quantity}])
+        except IntegrityError:
+            _execute(db, update(models.Inventory).where(
+                models.Inventory.item_id == item_id
+            ).values(quantity=models.Inventory.quantity + quantity))
+    ledger.record(db, "restock", {item_id: quantity})
+    change_feed.inventory_changed(db, [item_id])
+
+def set_quantity(db: Session, item_id: int, quantity: int) -> bool:
+    """Overwrite an item's stock level; returns False when it has no stock row"""
+    # The previous level is locked and read for the ledger
+    current = lock_levels(db, [item_id]).get(item_id)
+    if current is None:
+        return False
+    quantity = max(quantity, 0)
+    _execute(db, update(models.Inventory).where(models.Inventory.item_id == item_id).values(quantity=quantity))
+    ledger.record(db, "adjustment", {item_id: quantity - current})
+    change_feed.inventory_changed(db, [item_id])
+    return True
+
+def withdraw(db: Session, item_id: int, quantity: Optional[int] = None) -> Optional[bool]:
+    """Remove ``quantity`` units (or the whole row when ``quantity`` is None).
+
+    Returns None when the item has no stock row, True when the row was removed
+    and False when stock remains.
+    """
+    # The previous level is locked and read so the ledger records what was
+    # actually taken, never more than the stock
+    current = lock_levels(db, [item_id]).get(item_id)
+    if current is None:
+        return None
+    taken = current if quantity is None else min(quantity, current)
+    if taken >= current:
+        _execute(db, delete(models.Inventory).where(models.Inventory.item_id == item_id))
+    else:
+        _execute(db, update(models.Inventory).where(
+            models.Inventory.item_id == item_id
+        ).values(quantity=models.Inventory.quantity - taken))
+    ledger.record(db, "withdrawal", {item_id: -taken})
+    change_feed.inventory_changed(db, [item_id])
+    return taken >= current
+
+def purge_empty(db: Session, item_ids: list[int]) -> int:
+    """Delete the stock rows of ``item_ids`` that dropped to zero or below"""
+    result = _execute(db, delete(models.Inventory).where(
+        models.Inventory.item_id.in_(item_ids),
+        models.Inventory.quantity <= 0,
+    ))
+    return result.rowcount
@@ -0,0 +1,44 @@
+"""
+Bulk order placement: set-based statements, lines attached to the right orders
+"""
+import pytest
+from sqlalchemy import select
+from database import SessionLocal, engine
+from query_budget import count_queries, instrument
+import models
+import order_service
+import schemas
+import stock
+
+ORDERS = 300
+
+@pytest.fixture(scope="module")
+def item_ids(seeded_db):
+    with SessionLocal() as db:
+        items = [models.Item(name=f"Bulk Test Item {n}", item_type="Test", cost=1.0 + n) for n in range(3)]
+        db.add_all(items)
+        db.flush()
+        db.add_all([models.Inventory(item_id=item.id, quantity=10 ** 6) for item in items])
+        db.commit()
+        return [item.id for item in items]
+
+def place(item_ids: list[int]) -> tuple[list[schemas.BulkOrderResult], int]:
+    # Order n has n % 3 + 1 lines, so the lines show which order they belong to
+    orders = [schemas.OrderCreate(items=[schemas.OrderItemCreate(item_id=item_id, quantity=n + 1)
+                                         for item_id in item_ids[:n % 3 + 1]]) for n in range(ORDERS)]
+    instrument(engine)
+    with SessionLocal() as db, count_queries() as counter:
+        results = stock.run_in_transaction(db, lambda s: order_service.place_orders(s, orders))
+    with SessionLocal() as db:
+        for n, result in enumerate(results):
+            lines = db.execute(select(models.OrderItem.item_id, models.OrderItem.quantity).where(
+                models.OrderItem.order_id == result.order_id)).all()
+            assert sorted(lines) == [(item_id, n + 1) for item_id in item_ids[:n % 3 + 1]]
+    return results, counter.count
+
+def test_headers_are_inserted_in_batches(item_ids):
+    results, statements = place(item_ids)
+    assert all(result.success for result in results)
+    assert len({result.order_id for result in results}) == ORDERS
+    # A fixed number of statements however many orders the batch holds
+    assert statements < 30
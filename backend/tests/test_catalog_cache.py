@@ -0,0 +1,17 @@
+"""
+The catalog cache never decides a write
+"""
+from sqlalchemy import update
+from database import SessionLocal
+import models
+
+def test_create_ignores_stale_cached_name(client):
+    created = client.post("/api/items", json={"name": "Renamed Elsewhere", "item_type": "Test", "cost": 1.0}).json()
+    assert client.get(f"/api/items/{created['id']}").status_code == 200
+    # Another worker renames the item; this process's cache still has the old name
+    with SessionLocal() as db:
+        db.execute(update(models.Item).where(models.Item.id == created["id"]).values(name="Renamed Elsewhere 2"))
+        db.commit()
+    response = client.post("/api/items", json={"name": "Renamed Elsewhere", "item_type": "Test", "cost": 1.0})
+    assert response.status_code == 200, response.text
+    assert client.post("/api/items", json={"name": "Renamed Elsewhere", "item_type": "Test", "cost": 1.0}).status_code == 400
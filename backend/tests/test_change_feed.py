@@ -0,0 +1,45 @@
+"""
+Change feed position and gap handling
+"""
+from datetime import datetime, timedelta
+import asyncio
+from types import SimpleNamespace
+import change_feed
+
+def event(id: int, age: float = 0.0):
+    return SimpleNamespace(id=id, kind="item", action="delete", key=id, data=None,
+                           occurred_at=datetime.now() - timedelta(seconds=age))
+
+def test_dashboard_sequence_without_a_poll(client):
+    assert isinstance(client.get("/api/dashboard").json()["sequence"], int)
+
+def test_fresh_gap_holds_back_later_events():
+    feed = change_feed.Feed()
+    feed.position = 10
+    assert feed._deliver([event(11), event(13), event(14)]) == 1
+    assert feed.position == 11
+
+def test_old_gaps_are_skipped_without_waiting():
+    feed = change_feed.Feed()
+    feed.position = 10
+    old = change_feed.CHANGE_FEED_GAP_SECONDS + 1
+    assert feed._deliver([event(12, old), event(15, old), event(16)]) == 3
+    assert (feed.position, feed.gaps_skipped) == (16, 2)
+
+def test_skipped_event_committed_late_resets_streams():
+    feed = change_feed.Feed()
+    feed.position = 10
+    old = change_feed.CHANGE_FEED_GAP_SECONDS + 1
+    assert feed._deliver([event(13, old)]) == 1
+    subscriber = change_feed.Subscriber()
+    feed._subscribers.add(subscriber)
+
+    feed._found_late([])
+    assert not subscriber.stale and sorted(feed._skipped) == [11, 12]
+    feed._found_late([12])
+    assert subscriber.stale and subscriber.queue.get_nowait() == (0, change_feed.RESET)
+    assert list(feed._skipped) == [11]
+    assert feed._late_position == 13
+
+    # A client resuming from before the late event reloads too
+    assert asyncio.run(feed.stream(12).__anext__()) == change_feed.RESET
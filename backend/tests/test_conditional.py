@@ -0,0 +1,23 @@
+"""
+Conditional GETs of the listings: ETag and Last-Modified
+"""
+import time
+
+def test_if_none_match(client):
+    first = client.get("/api/orders", params={"limit": 10})
+    assert client.get("/api/orders", params={"limit": 10},
+                      headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+def test_if_modified_since_sees_deletes(client):
+    created = client.post("/api/items", json={"name": "Conditional Test Item", "item_type": "Test", "cost": 1.0})
+    assert created.status_code == 200
+    # Last-Modified is only sent once the second of the latest change is over
+    time.sleep(1.1)
+    listing = client.get("/api/items", params={"limit": 10})
+    last_modified = listing.headers["last-modified"]
+    assert client.get("/api/items", params={"limit": 10},
+                      headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    assert client.delete(f"/api/items/{created.json()['id']}").status_code == 200
+    assert client.get("/api/items", params={"limit": 10},
+                      headers={"If-Modified-Since": last_modified}).status_code == 200
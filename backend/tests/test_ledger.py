@@ -0,0 +1,33 @@
+"""
+Inventory snapshots: every snapshot holds the full stock level of every item
+"""
+from datetime import datetime
+from sqlalchemy import select
+from database import SessionLocal
+import ledger
+import models
+
+def snapshot() -> tuple[datetime, dict[int, int]]:
+    as_of = datetime.now()
+    with SessionLocal() as db:
+        assert ledger.take_snapshot(db, as_of) > 0
+        db.commit()
+        return as_of, dict(db.execute(select(models.InventorySnapshot.item_id, models.InventorySnapshot.quantity).where(
+            models.InventorySnapshot.as_of == as_of)).all())
+
+def test_items_that_did_not_move_stay_in_the_snapshot(client):
+    still, moved = [client.post("/api/items", json={"name": f"Ledger Snapshot Item {n}", "item_type": "Test",
+                                                    "cost": 1.0}).json()["id"] for n in range(2)]
+    assert client.post("/api/inventory", json={"item_id": still, "quantity": 7}).status_code == 200
+    _, first = snapshot()
+    assert client.post("/api/inventory", json={"item_id": moved, "quantity": 4}).status_code == 200
+    as_of, second = snapshot()
+    # Only one item moved in between, yet the second snapshot has them all
+    assert second == {**first, moved: 4}
+    assert second[still] == 7
+
+    at = datetime.now().isoformat()
+    levels = {row["item_id"]: row["quantity"] for row in client.get("/api/inventory/stock-at", params={"at": at}).json()}
+    assert levels[still] == 7 and levels[moved] == 4
+    stock = client.get(f"/api/inventory/{still}/stock-at", params={"at": at}).json()
+    assert stock["quantity"] == 7 and stock["snapshot_at"] == as_of.isoformat()
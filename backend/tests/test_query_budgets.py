@@ -0,0 +1,50 @@
+"""
+Every endpoint with a ``@query_budget`` stays within it (QUERY_BUDGET_MODE=raise)
+"""
+from datetime import date, datetime, timedelta
+import pytest
+from fastapi.routing import APIRoute
+
+NOW = datetime.now().isoformat()
+LAST_MONTH = (date.today() - timedelta(days=30)).isoformat()
+
+# One representative request per budgeted route: (method, route path, url, request kwargs)
+CASES = [
+    ("GET", "/api/items", "/api/items", {"params": {"limit": 50}}),
+    ("GET", "/api/items/types", "/api/items/types", {}),
+    ("GET", "/api/items/{item_id}", "/api/items/1", {}),
+    ("GET", "/api/inventory", "/api/inventory", {"params": {"limit": 50}}),
+    ("GET", "/api/inventory/forecast", "/api/inventory/forecast", {"params": {"history_days": 90}}),
+    ("GET", "/api/inventory/stock-at", "/api/inventory/stock-at", {"params": {"at": NOW}}),
+    ("GET", "/api/inventory/{item_id}/stock-at", "/api/inventory/1/stock-at", {"params": {"at": NOW}}),
+    ("GET", "/api/inventory/{item_id}/movements", "/api/inventory/1/movements", {}),
+    ("GET", "/api/inventory/{item_id}", "/api/inventory/1", {}),
+    ("POST", "/api/inventory", "/api/inventory", {"json": {"item_id": 2, "quantity": 5}}),
+    ("PUT", "/api/inventory/{item_id}", "/api/inventory/3", {"json": {"quantity": 50}}),
+    ("GET", "/api/orders", "/api/orders", {"params": {"limit": 50}}),
+    ("GET", "/api/orders/stats/weekly", "/api/orders/stats/weekly", {}),
+    ("GET", "/api/analytics/revenue-by-type", "/api/analytics/revenue-by-type", {"params": {"start": LAST_MONTH}}),
+    ("GET", "/api/analytics/top-items", "/api/analytics/top-items", {}),
+    ("GET", "/api/analytics/sales", "/api/analytics/sales", {"params": {"granularity": "month"}}),
+    ("GET", "/api/dashboard", "/api/dashboard", {}),
+]
+
+def budgeted_routes() -> set:
+    import main
+
+    return {(method, route.path) for route in main.app.routes if isinstance(route, APIRoute)
+            and hasattr(route.endpoint, "query_budget") for method in route.methods}
+
+def test_every_budgeted_endpoint_has_a_case():
+    assert budgeted_routes() == {(method, path) for method, path, _, _ in CASES}
+
+@pytest.mark.parametrize("method, path, url, kwargs", CASES, ids=[f"{c[0]} {c[1]}" for c in CASES])
+def test_endpoint_within_budget(client, method, path, url, kwargs):
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+
+def test_first_restock_within_budget(client):
+    # The case above restocks an existing row; a first restock also inserts it
+    item = client.post("/api/items", json={"name": "Budget First Restock", "item_type": "Test", "cost": 1.0}).json()
+    response = client.post("/api/inventory", json={"item_id": item["id"], "quantity": 5})
+    assert response.status_code == 200, response.text
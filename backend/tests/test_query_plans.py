@@ -0,0 +1,14 @@
+"""
+None of the hot queries reads a whole table (see query_plans.py)
+"""
+import query_plans
+from database import SessionLocal
+
+def test_hot_queries_use_indexes(seeded_db):
+    scans = {}
+    with SessionLocal() as db:
+        for name, statement in query_plans.hot_queries(db).items():
+            plan, scanned = query_plans.full_scans(db, statement)
+            if scanned:
+                scans[name] = plan
+    assert scans == {}
@@ -0,0 +1,28 @@
+"""
+Daily order rollups: sharded per-day totals
+"""
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from database import SessionLocal
+import models
+
+ORDERS = 40
+
+def this_week(client) -> dict:
+    weeks = client.get("/api/orders/stats/weekly").json()
+    return weeks[-1] if weeks else {"total_orders": 0, "total_amount": 0.0}
+
+def test_weekly_stats_sum_the_shards(client):
+    item = client.post("/api/items", json={"name": "Rollup Shard Item", "item_type": "Test", "cost": 2.5}).json()
+    assert client.post("/api/inventory", json={"item_id": item["id"], "quantity": ORDERS}).status_code == 200
+    before = this_week(client)
+    for _ in range(ORDERS):
+        assert client.post("/api/orders", json={"items": [{"item_id": item["id"], "quantity": 1}]}).status_code == 200
+
+    after = this_week(client)
+    assert after["total_orders"] == before["total_orders"] + ORDERS
+    assert after["total_amount"] == pytest.approx(before["total_amount"] + ORDERS * 2.5)
+    with SessionLocal() as db:
+        shards = db.scalar(select(func.count()).where(models.DailyOrderRollup.day == date.today()))
+    assert shards > 1
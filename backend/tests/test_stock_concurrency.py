@@ -0,0 +1,71 @@
+"""
+Concurrent orders for one item with limited stock never oversell it
+"""
+import threading
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from database import SessionLocal
+import models
+import order_service
+import schemas
+import stock
+
+THREADS = 8
+ORDERS_PER_THREAD = 10
+STOCKED = 25
+
+def test_concurrent_orders_do_not_oversell(seeded_db):
+    with SessionLocal() as db:
+        item = models.Item(name="Concurrency Test Item", item_type="Test", cost=10.0)
+        db.add(item)
+        db.flush()
+        db.add(models.Inventory(item_id=item.id, quantity=STOCKED))
+        db.commit()
+        item_id = item.id
+
+    def quantity(db) -> int:
+        # The stock row is removed when it reaches zero
+        return db.execute(select(models.Inventory.quantity).where(models.Inventory.item_id == item_id)).scalar() or 0
+
+    start = threading.Barrier(THREADS + 1)
+    done = threading.Event()
+    placed, rejected, errors, levels = [], [], [], []
+
+    def order(worker: int):
+        lines = [schemas.OrderItemCreate(item_id=item_id, quantity=1 + worker % 2)]
+        with SessionLocal() as db:
+            start.wait()
+            for _ in range(ORDERS_PER_THREAD):
+                try:
+                    stock.run_in_transaction(db, lambda s: order_service.place_order(s, lines))
+                    placed.append(lines[0].quantity)
+                except HTTPException:
+                    rejected.append(worker)
+                except Exception as e:
+                    errors.append(e)
+
+    def watch():
+        with SessionLocal() as db:
+            while not done.is_set():
+                levels.append(quantity(db))
+                db.rollback()
+
+    workers = [threading.Thread(target=order, args=(n,)) for n in range(THREADS)]
+    watcher = threading.Thread(target=watch)
+    for thread in workers + [watcher]:
+        thread.start()
+    start.wait()
+    for thread in workers:
+        thread.join()
+    done.set()
+    watcher.join()
+
+    with SessionLocal() as db:
+        remaining = quantity(db)
+        sold = db.execute(select(func.coalesce(func.sum(models.OrderItem.quantity), 0)).where(
+            models.OrderItem.item_id == item_id)).scalar()
+    assert errors == []
+    assert rejected, "the orders should have run out of stock"
+    assert sold == sum(placed)
+    assert sold + remaining == STOCKED
+    assert min(levels + [remaining]) >= 0
@@ -0,0 +1,26 @@
+"""
+Dialect-aware INSERT ... ON CONFLICT helper
+"""
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+def upsert(db: Session, table, rows: list[dict], keys: list[str], update):
+    """Insert ``rows`` into ``table`` and resolve key collisions in the database.
+
+    ``update`` receives the proxy for the incoming row (``inserted`` on MySQL,
+    ``excluded`` on SQLite/PostgreSQL) and returns the column assignments to
+    apply to the existing row.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(**update(stmt.inserted))
+    elif dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_=update(stmt.excluded))
+    else:
+        raise NotImplementedError(f"Upsert is not supported for dialect {dialect}")
+    db.execute(stmt, rows)
@@ -1,35 +1,106 @@
-import axios from 'axios';
-
-const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
-
-const api = axios.create({
-  baseURL: `${API_URL}/api`,
-  headers: {
-    'Content-Type': 'application/json',
-  },
-});
-
-export const itemsAPI = {
-  getAll: () => api.get('/items'),
-  getById: (id) => api.get(`/items/${id}`),
-  create: (data) => api.post('/items', data),
-  update: (id, data) => api.put(`/items/${id}`, data),
-  delete: (id) => api.delete(`/items/${id}`),
-};
-
-export const inventoryAPI = {
-  getAll: () => api.get('/inventory'),
-  getByItemId: (itemId) => api.get(`/inventory/${itemId}`),
-  add: (data) => api.post('/inventory', data),
-  update: (itemId, data) => api.put(`/inventory/${itemId}`, data),
-  remove: (itemId, quantity) => api.delete(`/inventory/${itemId}?quantity=${quantity || ''}`),
-};
-
-export const ordersAPI = {
-  getAll: () => api.get('/orders'),
-  create: (data) => api.post('/orders', data),
-  getWeeklyStats: (weeks = 12) => api.get(`/orders/stats/weekly?weeks=${weeks}`),
-};
-
-export default api;
-
+import axios from 'axios';
+
+const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+const api = axios.create({
+  baseURL: `${API_URL}/api`,
+  headers: {
+    'Content-Type': 'application/json',
+  },
+  // Send the backend's read-your-writes cookie, so reads right after a write
+  // are served by the primary database rather than a lagging replica
+  withCredentials: true,
+  // 304 Not Modified is answered from the ETag cache below
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+});
+
+// Conditional GETs: remember the ETag and body of each GET response and send
+// If-None-Match on the next request for the same URL, so unchanged listings
+// come back as an empty 304 instead of the full JSON. Compressed responses
+// (gzip/brotli) are decoded by the browser transparently. The cache keeps the
+// ETAG_CACHE_SIZE most recently used URLs (a Map iterates in insertion order,
+// so the first key is the least recently used).
+const ETAG_CACHE_SIZE = 100;
+const etagCache = new Map();
+
+const etagCacheGet = (key) => {
+  const cached = etagCache.get(key);
+  if (cached) {
+    etagCache.delete(key);
+    etagCache.set(key, cached);
+  }
+  return cached;
+};
+
+const etagCacheSet = (key, value) => {
+  etagCache.delete(key);
+  etagCache.set(key, value);
+  if (etagCache.size > ETAG_CACHE_SIZE) {
+    etagCache.delete(etagCache.keys().next().value);
+  }
+};
+
+api.interceptors.request.use((config) => {
+  if ((config.method || 'get').toLowerCase() === 'get') {
+    const cached = etagCacheGet(api.getUri(config));
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+  }
+  return config;
+});
+
+api.interceptors.response.use((response) => {
+  if ((response.config.method || 'get').toLowerCase() !== 'get') {
+    return response;
+  }
+  const key = api.getUri(response.config);
+  if (response.status === 304) {
+    const cached = etagCacheGet(key);
+    return { ...response, status: 200, data: cached ? cached.data : response.data };
+  }
+  const etag = response.headers.etag;
+  if (etag) {
+    etagCacheSet(key, { etag, data: response.data });
+  }
+  return response;
+});
+
+// Listing filters are passed as query params, e.g.
+// itemsAPI.getAll({ q: 'mri', item_type: 'MRI Machine', max_cost: 2000000 })
+// inventoryAPI.getAll({ max_quantity: 5 }) for low stock
+export const itemsAPI = {
+  getAll: (params) => api.get('/items', { params }),
+  getTypes: (params) => api.get('/items/types', { params }),
+  getById: (id) => api.get(`/items/${id}`),
+  create: (data) => api.post('/items', data),
+  update: (id, data) => api.put(`/items/${id}`, data),
+  delete: (id) => api.delete(`/items/${id}`),
+};
+
+export const inventoryAPI = {
+  getAll: (params) => api.get('/inventory', { params }),
+  getByItemId: (itemId) => api.get(`/inventory/${itemId}`),
+  add: (data) => api.post('/inventory', data),
+  update: (itemId, data) => api.put(`/inventory/${itemId}`, data),
+  remove: (itemId, quantity) => api.delete(`/inventory/${itemId}?quantity=${quantity || ''}`),
+};
+
+// Items and inventory in one snapshot, with the change feed position it is current to
+export const dashboardAPI = {
+  get: () => api.get('/dashboard'),
+};
+
+// Server-sent change feed after sequence number `since`; on reconnect the
+// browser resumes from the last event received (Last-Event-ID)
+export const openChangeFeed = (since) =>
+  new EventSource(`${API_URL}/api/changes${since != null ? `?since=${since}` : ''}`, { withCredentials: true });
+
+export const ordersAPI = {
+  getAll: () => api.get('/orders'),
+  create: (data) => api.post('/orders', data),
+  getWeeklyStats: (weeks = 12) => api.get(`/orders/stats/weekly?weeks=${weeks}`),
+};
+
+export default api;
+
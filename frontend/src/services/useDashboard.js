@@ -0,0 +1,84 @@
+import { useEffect, useMemo, useState } from 'react';
+import { dashboardAPI, openChangeFeed } from './api';
+
+// Feed events carry the new state of a row, or only its key when it was deleted
+const applyChange = (rows, keyOf, change) => {
+  const index = rows.findIndex((row) => keyOf(row) === change.key);
+  if (change.action === 'delete') {
+    return index === -1 ? rows : rows.filter((_, i) => i !== index);
+  }
+  if (index === -1) {
+    return [...rows, change.data];
+  }
+  const next = rows.slice();
+  next[index] = change.data;
+  return next;
+};
+
+// Items and inventory from one /dashboard snapshot, kept current by the change
+// feed instead of refetching both lists after every write. Inventory rows get
+// their `item` attached, as in the /inventory listing.
+function useDashboard() {
+  const [items, setItems] = useState([]);
+  const [levels, setLevels] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let feed = null;
+    let cancelled = false;
+
+    const apply = (event) => {
+      const change = JSON.parse(event.data);
+      if (change.type === 'item') {
+        setItems((rows) => applyChange(rows, (row) => row.id, change));
+      } else if (change.type === 'inventory') {
+        setLevels((rows) => applyChange(rows, (row) => row.item_id, change));
+      }
+    };
+
+    const load = async () => {
+      if (feed) {
+        feed.close();
+      }
+      try {
+        const { data } = await dashboardAPI.get();
+        if (cancelled) {
+          return;
+        }
+        setItems(data.items);
+        setLevels(data.inventory);
+        feed = openChangeFeed(data.sequence);
+        feed.onmessage = apply;
+        // Sent when the feed can no longer catch this client up: start over
+        feed.addEventListener('reset', load);
+      } catch (err) {
+        console.error('Error loading dashboard:', err);
+        setError(err);
+      } finally {
+        if (!cancelled) {
+          setLoading(false);
+        }
+      }
+    };
+
+    load();
+    return () => {
+      cancelled = true;
+      if (feed) {
+        feed.close();
+      }
+    };
+  }, []);
+
+  const inventory = useMemo(() => {
+    const byId = new Map(items.map((item) => [item.id, item]));
+    return levels
+      .filter((inv) => byId.has(inv.item_id))
+      .map((inv) => ({ ...inv, item: byId.get(inv.item_id) }));
+  }, [items, levels]);
+
+  return { items, inventory, loading, error };
+}
+
+export default useDashboard;